@@ -1,6 +1,9 @@
 """应用入口。"""
 from __future__ import annotations
 
+import asyncio
+import threading
+from concurrent.futures import Future
 from pathlib import Path
 from dataclasses import replace
 
@@ -16,6 +19,7 @@ from video_audio_mixer_gui.services.mix_planner import MixPlanner
 from video_audio_mixer_gui.services.task_executor import TaskExecutor
 from video_audio_mixer_gui.services.preview_controller import PreviewController, PreviewSection
 from video_audio_mixer_gui.dragdrop.file_collector import collect_media_from_paths
+from video_audio_mixer_gui.utils.ffmpeg_probe import shutdown_probe_pool
 
 
 def run_app() -> None:
@@ -35,6 +39,9 @@ def run_app() -> None:
     ffmpeg_adapter = FFmpegAdapter()
     executor = TaskExecutor(ffmpeg_adapter=ffmpeg_adapter, logger=logger, max_workers=config.max_workers)
     preview_controller = PreviewController(planner=planner, adapter=ffmpeg_adapter, logger=logger)
+    # 预览在独立事件循环线程中运行，避免等待 ffmpeg/ffplay 时阻塞界面
+    preview_loop = asyncio.new_event_loop()
+    threading.Thread(target=preview_loop.run_forever, name="preview-loop", daemon=True).start()
 
     window = MainWindow(app_config=config)
 
@@ -67,9 +74,10 @@ def run_app() -> None:
         window.set_audio_clips(video_id, session.audio_clips, session.video_clip.fps)
 
     def on_audio_parameters_changed(video_id: str, audio_id: str, start_seconds: float, source_offset: float) -> None:
-        session = repository.get_session(video_id)
-        repository.update_audio_parameters(video_id, audio_id, start_seconds, source_offset, session.video_clip.fps)
-        window.set_audio_clips(video_id, session.audio_clips, session.video_clip.fps)
+        fps = repository.get_session(video_id).video_clip.fps
+        repository.update_audio_parameters(video_id, audio_id, start_seconds, source_offset, fps)
+        # 音频片段不可变，更新后重新读取最新快照中的列表
+        window.set_audio_clips(video_id, repository.get_audio_clips(video_id), fps)
 
     def on_global_config_changed(
         random_enabled: bool,
@@ -108,7 +116,7 @@ def run_app() -> None:
             msgs = import_result.errors + import_result.warnings
             window.show_warning("\n".join(msgs))
 
-    def on_batch_audio_selected(video_ids: list[str], category: AudioCategory, paths: list[Path]) -> None:
+    def on_batch_audio_selected(video_ids: tuple[str, ...], category: AudioCategory, paths: list[Path]) -> None:
         import_result = collect_media_from_paths(paths)
         audio_clips = import_result.audios
         if not audio_clips:
@@ -135,7 +143,12 @@ def run_app() -> None:
     def on_preview(video_id: str) -> None:
         session = repository.get_session(video_id)
         section = PreviewSection(start=0.0, duration=config.preview_duration)
-        preview_controller.preview(session, section)
+        future = asyncio.run_coroutine_threadsafe(preview_controller.preview_async(session, section), preview_loop)
+        future.add_done_callback(on_preview_done)
+
+    def on_preview_done(future: Future) -> None:
+        if not future.cancelled() and future.exception() is not None:
+            logger.log_error(f"预览失败: {future.exception()}")
 
     window.sessionSelected.connect(on_session_selected)
     window.videoDeleteRequested.connect(on_video_delete)
@@ -149,6 +162,9 @@ def run_app() -> None:
 
     def cleanup_on_exit() -> None:
         preview_controller.cleanup()
+        executor.shutdown(wait=False)
+        preview_loop.call_soon_threadsafe(preview_loop.stop)
+        shutdown_probe_pool()
 
     app.aboutToQuit.connect(cleanup_on_exit)
 
@@ -6,11 +6,16 @@
 from __future__ import annotations
 
 import subprocess
+import sys
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Optional
 
 
+# CREATE_NO_WINDOW 仅在 Windows 上存在
+_CREATION_FLAGS: int = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+
 @dataclass(slots=True)
 class FFmpegResult:
     """FFmpeg 执行结果。"""
@@ -26,36 +31,51 @@ class FFmpegAdapter:
     def __init__(self) -> None:
         self._base_command: List[str] = ["ffmpeg", "-hide_banner", "-loglevel", "warning", "-y"]
 
-    def run_command(self, command: List[str]) -> FFmpegResult:
-        """执行 ffmpeg 命令。"""
+    def run_command(self, command: List[str], input_text: Optional[str] = None) -> FFmpegResult:
+        """执行 ffmpeg 命令，`input_text` 非空时写入标准输入。"""
 
         full_command = self._base_command + command
-        process = subprocess.Popen(
+        completed = subprocess.run(
             full_command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            encoding="utf-8",
-            creationflags=subprocess.CREATE_NO_WINDOW,
+            input=input_text.encode("utf-8") if input_text is not None else None,
+            stdin=None if input_text is not None else subprocess.DEVNULL,
+            capture_output=True,
+            creationflags=_CREATION_FLAGS,
+        )
+        return FFmpegResult(
+            return_code=completed.returncode,
+            stdout=completed.stdout.decode("utf-8", errors="replace"),
+            stderr=completed.stderr.decode("utf-8", errors="replace"),
         )
-        stdout, stderr = process.communicate()
-        return FFmpegResult(return_code=process.returncode, stdout=stdout, stderr=stderr)
 
-    def concat_videos(self, list_file: Path, output_path: Path) -> FFmpegResult:
-        """使用 concat demuxer 合并视频。"""
+    def concat_videos(
+        self,
+        output_path: Path,
+        list_file: Optional[Path] = None,
+        list_content: Optional[str] = None,
+    ) -> FFmpegResult:
+        """使用 concat demuxer 合并视频。
+
+        提供 `list_content` 时通过标准输入传递列表，无需落盘临时列表文件。
+        """
 
+        if list_content is not None:
+            source = ["-protocol_whitelist", "file,pipe", "-i", "pipe:0"]
+        elif list_file is not None:
+            source = ["-i", str(list_file)]
+        else:
+            raise ValueError("concat_videos 需要 list_file 或 list_content")
         command = [
             "-f",
             "concat",
             "-safe",
             "0",
-            "-i",
-            str(list_file),
+            *source,
             "-c",
             "copy",
             str(output_path),
         ]
-        return self.run_command(command)
+        return self.run_command(command, input_text=list_content)
 
     def generate_black_clip(
         self,
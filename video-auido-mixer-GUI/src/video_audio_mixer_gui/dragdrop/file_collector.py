@@ -1,46 +1,78 @@
 """拖放媒体收集模块。"""
 from __future__ import annotations
 
+import os
 from pathlib import Path
-from typing import Iterable
+from stat import S_ISDIR, S_ISREG
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from video_audio_mixer_gui.models.media import AudioCategory, AudioClip, ImportResult, VideoClip
-from video_audio_mixer_gui.utils.path_utils import AUDIO_EXTENSIONS, VIDEO_EXTENSIONS
-from video_audio_mixer_gui.utils.ffmpeg_probe import probe_audio, probe_video
+from video_audio_mixer_gui.utils.path_utils import AUDIO_SUFFIXES, MEDIA_SUFFIXES, VIDEO_SUFFIXES, FileRecord
+from video_audio_mixer_gui.utils.ffmpeg_probe import AudioMetadata, VideoMetadata, probe_many
+
+
+_ProbeResult = Tuple[Optional[VideoMetadata], Optional[AudioMetadata]]
 
 
 def collect_media_from_paths(paths: Iterable[Path]) -> ImportResult:
     """根据拖入路径收集媒体文件。"""
 
     result = ImportResult()
+    records: List[FileRecord] = []
     for path in paths:
-        if path.is_dir():
-            _collect_from_directory(directory_path=path, result=result)
-        elif path.is_file():
-            _collect_single_file(file_path=path, result=result)
+        try:
+            stat = path.stat()
+        except OSError:
+            stat = None
+        if stat is not None and S_ISDIR(stat.st_mode):
+            records.extend(_list_directory(directory_path=path, result=result))
+        elif stat is not None and S_ISREG(stat.st_mode):
+            records.append(FileRecord.from_stat(os.fspath(path), stat))
         else:
             result.errors.append(f"路径不存在或无效: {path}")
+    # 先汇总全部媒体文件再并发探测，避免逐个串行等待 ffprobe；
+    # 探测缓存直接复用这里的 stat 结果，每个文件只 stat 一次
+    media_records = [record for record in records if record.suffix in MEDIA_SUFFIXES]
+    probes: Dict[str, _ProbeResult] = {
+        record.path: probe for record, probe in zip(media_records, probe_many(media_records))
+    }
+    for record in records:
+        _collect_single_file(record=record, result=result, probe=probes.get(record.path, (None, None)))
     return result
 
 
-def _collect_from_directory(directory_path: Path, result: ImportResult) -> None:
-    """从目录中收集媒体文件。"""
+def _list_directory(directory_path: Path, result: ImportResult) -> List[FileRecord]:
+    """列出目录中的媒体文件。
+
+    先按扩展名过滤再 stat，非媒体文件不产生系统调用；单个条目不可访问时跳过。
+    """
 
-    found = False
-    for child in directory_path.iterdir():
-        if child.is_file():
-            _collect_single_file(file_path=child, result=result)
-            found = True
-    if not found:
-        result.warnings.append(f"目录为空: {directory_path}")
+    children: List[FileRecord] = []
+    try:
+        with os.scandir(directory_path) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1].lower() not in MEDIA_SUFFIXES:
+                    continue
+                try:
+                    if entry.is_file():
+                        children.append(FileRecord.from_stat(entry.path, entry.stat()))
+                except OSError:
+                    continue
+    except OSError:
+        result.errors.append(f"无法读取目录: {directory_path}")
+        return children
+    if not children:
+        result.warnings.append(f"目录中没有媒体文件: {directory_path}")
+    return children
 
 
-def _collect_single_file(file_path: Path, result: ImportResult) -> None:
-    """收集单个媒体文件。"""
+def _collect_single_file(record: FileRecord, result: ImportResult, probe: _ProbeResult) -> None:
+    """根据探测结果收集单个媒体文件。"""
 
-    suffix = file_path.suffix.lower()
-    if suffix in VIDEO_EXTENSIONS:
-        metadata = probe_video(file_path)
+    file_path = Path(record.path)
+    suffix = record.suffix
+    if suffix in VIDEO_SUFFIXES:
+        metadata = probe[0]
         if metadata is None:
             result.warnings.append(f"无法读取视频信息: {file_path}")
             duration_seconds = 0.0
@@ -61,9 +93,9 @@ def _collect_single_file(file_path: Path, result: ImportResult) -> None:
             has_audio=has_audio,
         )
         result.videos.append(video)
-    elif suffix in AUDIO_EXTENSIONS:
+    elif suffix in AUDIO_SUFFIXES:
         category = _categorize_audio(file_path)
-        metadata = probe_audio(file_path)
+        metadata = probe[1]
         if metadata is None:
             result.warnings.append(f"无法读取音频信息: {file_path}")
             duration_seconds = 0.0
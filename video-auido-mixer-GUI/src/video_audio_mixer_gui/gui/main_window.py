@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtWidgets import QHeaderView
@@ -11,6 +12,7 @@ from PySide6.QtWidgets import QHeaderView
 from video_audio_mixer_gui.dragdrop.file_collector import collect_media_from_paths
 from video_audio_mixer_gui.models.media import AudioClip, AudioCategory, ImportResult, MixSession
 from video_audio_mixer_gui.core.config_manager import AppConfig
+from video_audio_mixer_gui.gui.session_model import SessionModel
 
 
 class AudioListWidget(QtWidgets.QListWidget):
@@ -19,31 +21,77 @@ class AudioListWidget(QtWidgets.QListWidget):
     def __init__(self, category: AudioCategory, parent: Optional[QtWidgets.QWidget] = None) -> None:
         super().__init__(parent)
         self._category = category
+        self._tooltip_provider: Optional[Callable[[str], Optional[str]]] = None
+        self._accept_drag = False
         self.setAcceptDrops(True)
         self.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.viewport().setAcceptDrops(True)
         self.setDropIndicatorShown(True)
 
+    def set_tooltip_provider(self, provider: Optional[Callable[[str], Optional[str]]]) -> None:
+        """设置按音频 ID 生成提示文本的回调，仅在悬停时调用。"""
+
+        self._tooltip_provider = provider
+
+    def viewportEvent(self, event: QtCore.QEvent) -> bool:  # type: ignore[override]
+        if event.type() == QtCore.QEvent.ToolTip and self._tooltip_provider is not None:
+            item = self.itemAt(event.pos())
+            text = self._tooltip_provider(item.data(QtCore.Qt.UserRole)) if item is not None else None
+            if text:
+                QtWidgets.QToolTip.showText(event.globalPos(), text, self.viewport())
+            else:
+                QtWidgets.QToolTip.hideText()
+                event.ignore()
+            return True
+        return super().viewportEvent(event)
+
     def dragEnterEvent(self, event: QtGui.QDragEnterEvent) -> None:  # type: ignore[override]
-        if event.mimeData().hasUrls():
+        # 拖入时判定一次，拖动过程中复用结果
+        self._accept_drag = event.mimeData().hasUrls()
+        if self._accept_drag:
             event.acceptProposedAction()
         else:
             event.ignore()
 
     def dragMoveEvent(self, event: QtGui.QDragMoveEvent) -> None:  # type: ignore[override]
-        if event.mimeData().hasUrls():
+        if self._accept_drag:
             event.acceptProposedAction()
         else:
             event.ignore()
 
+    def dragLeaveEvent(self, event: QtGui.QDragLeaveEvent) -> None:  # type: ignore[override]
+        self._accept_drag = False
+        super().dragLeaveEvent(event)
+
     def dropEvent(self, event: QtGui.QDropEvent) -> None:  # type: ignore[override]
+        self._accept_drag = False
         urls = event.mimeData().urls()
-        paths = [Path(url.toLocalFile()) for url in urls]
+        paths = list(map(Path, filter(None, map(QtCore.QUrl.toLocalFile, urls))))
         if paths:
             self.audioDropped.emit(paths, self._category)
         event.acceptProposedAction()
 
 
+class _ImportWorker(QtCore.QObject, QtCore.QRunnable):
+    """在线程池中扫描拖入路径，完成后通过信号把结果送回 GUI 线程。"""
+
+    resultReady = QtCore.Signal(ImportResult)
+
+    def __init__(self, paths: List[Path]) -> None:
+        QtCore.QObject.__init__(self)
+        QtCore.QRunnable.__init__(self)
+        self._paths = paths
+        # 由主窗口持有引用，直到结果送达后再释放
+        self.setAutoDelete(False)
+
+    def run(self) -> None:  # type: ignore[override]
+        try:
+            result = collect_media_from_paths(self._paths)
+        except Exception as exc:
+            result = ImportResult(errors=[f"导入失败: {exc}"])
+        self.resultReady.emit(result)
+
+
 class MainWindow(QtWidgets.QMainWindow):
     """应用主窗口。"""
 
@@ -57,22 +105,43 @@ class MainWindow(QtWidgets.QMainWindow):
     audioSelectionChanged = QtCore.Signal(str, str)
     globalConfigChanged = QtCore.Signal(bool, int, int, float, float, bool, Path, bool)
     audioFilesDropped = QtCore.Signal(list, AudioCategory)
-    batchAudioSelected = QtCore.Signal(list, AudioCategory, list)
+    batchAudioSelected = QtCore.Signal(tuple, AudioCategory, list)
+
+    _MATCHED_STYLE = "color: #090"
+    _UNMATCHED_STYLE = "color: #b00"
+    _INDICATOR_STATES: Dict[bool, Tuple[str, str, str]] = {
+        True: ("matched", "已匹配", _MATCHED_STYLE),
+        False: ("unmatched", "未匹配", _UNMATCHED_STYLE),
+    }
+    _CONFIG_DEBOUNCE_MS = 150
+    _AUDIO_FILTER = "音频文件 (*.wav *.mp3 *.flac *.aac *.ogg *.m4a);;所有文件 (*)"
 
     def __init__(self, app_config: AppConfig) -> None:
         super().__init__()
         self.setWindowTitle("音视频混合工具")
         self.resize(1400, 760)
         self._current_video_id: Optional[str] = None
-        self._shortcuts: List[QtGui.QShortcut] = []
         self._audio_lists: Dict[AudioCategory, AudioListWidget] = {}
         self._app_config = app_config
         self._current_video_fps: float = 0.0
+        self._inv_fps: float = 0.0
         self._current_audio_clips: List[AudioClip] = []
+        self._audio_clip_by_id: Dict[str, AudioClip] = {}
+        self._import_workers: Set[_ImportWorker] = set()
+        self._last_batch_dir: Optional[str] = None
+        self._rendered_audio: Dict[AudioCategory, Dict[str, QtWidgets.QListWidgetItem]] = {
+            AudioCategory.SE: {},
+            AudioCategory.VO: {},
+            AudioCategory.MUSIC: {},
+        }
+        # 合并连续的参数调整，避免每次微调都触发下游处理与配置写盘
+        self._config_timer = QtCore.QTimer(self)
+        self._config_timer.setSingleShot(True)
+        self._config_timer.setInterval(self._CONFIG_DEBOUNCE_MS)
+        self._config_timer.timeout.connect(self._emit_global_config)
         self._setup_ui()
         self._setup_actions()
         self._setup_drag_drop()
-        self._setup_shortcuts()
 
     def _setup_ui(self) -> None:
         """初始化界面布局。"""
@@ -80,9 +149,9 @@ class MainWindow(QtWidgets.QMainWindow):
         central_widget = QtWidgets.QWidget(self)
         layout = QtWidgets.QHBoxLayout(central_widget)
 
-        self.video_list = QtWidgets.QTreeWidget(central_widget)
-        self.video_list.setColumnCount(5)
-        self.video_list.setHeaderLabels(["#", "视频", "SE", "VO", "MUSIC"])
+        self.video_model = SessionModel(self)
+        self.video_list = QtWidgets.QTreeView(central_widget)
+        self.video_list.setModel(self.video_model)
         self.video_list.setRootIsDecorated(False)
         self.video_list.setUniformRowHeights(True)
         self.video_list.setMinimumWidth(420)
@@ -113,8 +182,12 @@ class MainWindow(QtWidgets.QMainWindow):
             (AudioCategory.MUSIC, "MUSIC"),
         ):
             list_widget = AudioListWidget(category=category, parent=right_panel)
+            list_widget.set_tooltip_provider(self._audio_tooltip)
             self.audio_tabs.addTab(list_widget, tab_name)
             self._audio_lists[category] = list_widget
+        self._widget_to_category: Dict[int, AudioCategory] = {
+            id(widget): category for category, widget in self._audio_lists.items()
+        }
         right_layout.addWidget(self.audio_tabs, stretch=1)
 
         status_group = QtWidgets.QGroupBox("匹配状态", right_panel)
@@ -254,7 +327,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.preview_button.clicked.connect(self._on_preview_clicked)
         self.mix_button.clicked.connect(self._on_mix_clicked)
-        self.video_list.itemSelectionChanged.connect(self._on_video_selected)
+        self.video_list.selectionModel().selectionChanged.connect(self._on_video_selected)
         self.save_audio_button.clicked.connect(self._on_save_audio_params)
         for widget in self._audio_lists.values():
             widget.itemSelectionChanged.connect(self._on_audio_selection_changed)
@@ -276,16 +349,10 @@ class MainWindow(QtWidgets.QMainWindow):
 
         self.setAcceptDrops(True)
 
-    def _setup_shortcuts(self) -> None:
-        """配置快捷键。"""
-
-        delete_shortcut = QtGui.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key_Delete), self)
-        delete_shortcut.activated.connect(self._handle_delete)
-        preview_shortcut = QtGui.QShortcut(QtGui.QKeySequence("Ctrl+P"), self)
-        preview_shortcut.activated.connect(self._on_preview_clicked)
-        mix_shortcut = QtGui.QShortcut(QtGui.QKeySequence("Ctrl+M"), self)
-        mix_shortcut.activated.connect(self._on_mix_clicked)
-        self._shortcuts.extend([delete_shortcut, preview_shortcut, mix_shortcut])
+    def closeEvent(self, event: QtGui.QCloseEvent) -> None:  # type: ignore[override]
+        if self._config_timer.isActive():
+            self._emit_global_config()
+        super().closeEvent(event)
 
     def dragEnterEvent(self, event: QtGui.QDragEnterEvent) -> None:  # type: ignore[override]
         if event.mimeData().hasUrls():
@@ -295,22 +362,33 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def dropEvent(self, event: QtGui.QDropEvent) -> None:  # type: ignore[override]
         urls = event.mimeData().urls()
-        paths = [Path(url.toLocalFile()) for url in urls]
-        self._emit_import(paths)
+        # 远程 URL 的本地路径为空字符串，在同一遍中过滤掉
+        paths = list(map(Path, filter(None, map(QtCore.QUrl.toLocalFile, urls))))
+        if paths:
+            self._emit_import(paths)
 
     def _emit_import(self, paths: List[Path]) -> None:
-        """发出媒体导入信号。"""
+        """在后台线程收集媒体，完成后发出媒体导入信号。"""
+
+        worker = _ImportWorker(paths)
+        worker.resultReady.connect(self._on_import_ready)
+        self._import_workers.add(worker)
+        self.statusBar().showMessage(f"正在导入 {len(paths)} 个路径...")
+        QtCore.QThreadPool.globalInstance().start(worker)
 
-        result = collect_media_from_paths(paths)
+    @QtCore.Slot(ImportResult)
+    def _on_import_ready(self, result: ImportResult) -> None:
+        """后台导入完成回调，运行于 GUI 线程。"""
+
+        worker = self.sender()
+        if isinstance(worker, _ImportWorker):
+            self._import_workers.discard(worker)
         self.mediaImported.emit(result)
 
     def _on_preview_clicked(self) -> None:
         """处理预览按钮点击。"""
 
-        current_item = self.video_list.currentItem()
-        if current_item is None:
-            return
-        video_id = current_item.data(0, QtCore.Qt.UserRole)
+        video_id = self.video_model.video_id(self.video_list.currentIndex())
         if video_id is None:
             return
         self._current_video_id = video_id
@@ -319,20 +397,18 @@ class MainWindow(QtWidgets.QMainWindow):
     def _on_mix_clicked(self) -> None:
         """处理混流按钮点击。"""
 
-        current_item = self.video_list.currentItem()
-        if current_item is None:
+        video_id = self.video_model.video_id(self.video_list.currentIndex())
+        if video_id is None:
             return
-        video_id = current_item.data(0, QtCore.Qt.UserRole)
         self._current_video_id = video_id
         self.mixRequested.emit(video_id)
 
     def _on_video_selected(self) -> None:
         """视频选择变化时发出会话选择信号。"""
 
-        current_item = self.video_list.currentItem()
-        if current_item is None:
+        video_id = self.video_model.video_id(self.video_list.currentIndex())
+        if video_id is None:
             return
-        video_id = current_item.data(0, QtCore.Qt.UserRole)
         self._current_video_id = video_id
         self.sessionSelected.emit(video_id)
 
@@ -375,40 +451,23 @@ class MainWindow(QtWidgets.QMainWindow):
         return None
 
     def get_audio_drop_category(self, widget: QtWidgets.QListWidget) -> Optional[AudioCategory]:
-        for category, list_widget in self._audio_lists.items():
-            if list_widget is widget:
-                return category
-        return None
+        return self._widget_to_category.get(id(widget))
 
     def set_video_sessions(self, sessions: List[MixSession]) -> None:
         """更新视频列表显示。"""
 
         current_id = self._current_video_id
-        self.video_list.blockSignals(True)
-        self.video_list.clear()
-        index_to_select = 0
-        for idx, session in enumerate(sessions, start=1):
-            counts = self._count_audio(session.audio_clips)
-            item = QtWidgets.QTreeWidgetItem(
-                [
-                    str(idx),
-                    session.video_clip.display_name,
-                    str(counts.get(AudioCategory.SE, 0)),
-                    str(counts.get(AudioCategory.VO, 0)),
-                    str(counts.get(AudioCategory.MUSIC, 0)),
-                ]
-            )
-            item.setData(0, QtCore.Qt.UserRole, session.video_clip.clip_id)
-            self.video_list.addTopLevelItem(item)
-            if current_id and session.video_clip.clip_id == current_id:
-                index_to_select = idx - 1
-        if sessions:
-            current_item = self.video_list.topLevelItem(index_to_select)
-            self.video_list.setCurrentItem(current_item)
-            self._current_video_id = current_item.data(0, QtCore.Qt.UserRole)
-        else:
-            self._current_video_id = None
-        self.video_list.blockSignals(False)
+        with QtCore.QSignalBlocker(self.video_list.selectionModel()):
+            # 模型一次性重置，视图按需读取数据，无需逐行创建条目
+            self.video_model.set_sessions(sessions)
+            if sessions:
+                current_index = self.video_model.index_of(current_id) if current_id else QtCore.QModelIndex()
+                if not current_index.isValid():
+                    current_index = self.video_model.index(0, 0)
+                self.video_list.setCurrentIndex(current_index)
+                self._current_video_id = self.video_model.video_id(current_index)
+            else:
+                self._current_video_id = None
         self.statusBar().showMessage(f"已加载视频 {len(sessions)} 个")
 
     @property
@@ -422,43 +481,78 @@ class MainWindow(QtWidgets.QMainWindow):
 
         if video_id is None:
             return
-        for idx in range(self.video_list.topLevelItemCount()):
-            item = self.video_list.topLevelItem(idx)
-            if item.data(0, QtCore.Qt.UserRole) == video_id:
-                self.video_list.setCurrentItem(item)
-                return
+        index = self.video_model.index_of(video_id)
+        if index.isValid():
+            self.video_list.setCurrentIndex(index)
 
     def set_audio_clips(self, video_id: str, clips: List[AudioClip], video_fps: float) -> None:
         """刷新音频标签页内容。"""
 
         self._current_video_id = video_id
         self._current_video_fps = video_fps
+        self._inv_fps = 1.0 / video_fps if video_fps > 0 else 0.0
         self._current_audio_clips = list(clips)
-        self._clear_audio_lists()
+        self._audio_clip_by_id = {clip.clip_id: clip for clip in self._current_audio_clips}
+        clips_by_category: Dict[AudioCategory, List[AudioClip]] = {category: [] for category in self._audio_lists}
         for clip in clips:
-            list_widget = self._audio_lists.get(clip.category)
-            if list_widget is None:
-                continue
-            item = QtWidgets.QListWidgetItem(clip.display_name)
-            item.setData(QtCore.Qt.UserRole, clip.clip_id)
-            start_info = clip.start_frame if clip.start_frame is not None else 0
-            item.setToolTip(f"起始帧: {start_info}\n时长: {clip.duration_seconds:.2f}s")
-            list_widget.addItem(item)
+            if clip.category in clips_by_category:
+                clips_by_category[clip.category].append(clip)
+        for category, list_widget in self._audio_lists.items():
+            self._sync_audio_list(list_widget, self._rendered_audio[category], clips_by_category[category])
         self._update_audio_form()
         self._refresh_status_indicators()
         self._refresh_video_row_counts(video_id)
 
+    def _sync_audio_list(
+        self,
+        widget: AudioListWidget,
+        rendered: Dict[str, QtWidgets.QListWidgetItem],
+        clips: List[AudioClip],
+    ) -> None:
+        """按差异更新单个音频列表，仅增删或修改发生变化的条目。"""
+
+        wanted_ids = {clip.clip_id for clip in clips}
+        widget.setUpdatesEnabled(False)
+        for clip_id in [clip_id for clip_id in rendered if clip_id not in wanted_ids]:
+            item = rendered.pop(clip_id)
+            widget.takeItem(widget.row(item))
+        for index, clip in enumerate(clips):
+            item = rendered.get(clip.clip_id)
+            if item is None:
+                # 按仓库中的顺序插入，保证显示顺序与混流顺序一致
+                item = QtWidgets.QListWidgetItem(clip.display_name)
+                item.setData(QtCore.Qt.UserRole, clip.clip_id)
+                widget.insertItem(index, item)
+                rendered[clip.clip_id] = item
+                continue
+            row = widget.row(item)
+            if row != index:
+                widget.insertItem(index, widget.takeItem(row))
+            if item.text() != clip.display_name:
+                item.setText(clip.display_name)
+        widget.setUpdatesEnabled(True)
+
+    def _audio_tooltip(self, clip_id: Optional[str]) -> Optional[str]:
+        """悬停时按需生成音频条目的提示文本。"""
+
+        clip = self._audio_clip_by_id.get(clip_id) if clip_id else None
+        if clip is None:
+            return None
+        start_info = clip.start_frame if clip.start_frame is not None else 0
+        return f"起始帧: {start_info}\n时长: {clip.duration_seconds:.2f}s"
+
     def _clear_audio_lists(self) -> None:
         """清空音频列表。"""
 
         for widget in self._audio_lists.values():
             widget.clear()
+        for rendered in self._rendered_audio.values():
+            rendered.clear()
         self.start_seconds_spin.setValue(0.0)
         self.start_frames_spin.setValue(0)
         self.source_offset_spin.setValue(0.0)
         for indicator in self.status_labels.values():
-            indicator.setText("未匹配")
-            indicator.setStyleSheet("color: #b00")
+            self._set_indicator_state(indicator, matched=False)
 
     def show_warning(self, message: str) -> None:
         """弹出警告信息。"""
@@ -490,21 +584,17 @@ class MainWindow(QtWidgets.QMainWindow):
         audio_id = current_item.data(QtCore.Qt.UserRole)
         if audio_id is None:
             return
-        for clip in self._current_audio_clips:
-            if clip.clip_id == audio_id:
-                seconds = 0.0
-                if clip.start_frame is not None and self._current_video_fps > 0:
-                    seconds = clip.start_frame / self._current_video_fps
-                self.start_seconds_spin.blockSignals(True)
-                self.start_frames_spin.blockSignals(True)
-                self.start_seconds_spin.setValue(seconds)
-                self.start_frames_spin.setValue(
-                    int(seconds * self._current_video_fps) if self._current_video_fps > 0 else 0
-                )
-                self.start_seconds_spin.blockSignals(False)
-                self.start_frames_spin.blockSignals(False)
-                self.source_offset_spin.setValue(clip.source_start_seconds)
-                break
+        clip = self._audio_clip_by_id.get(audio_id)
+        if clip is None:
+            return
+        fps = self._current_video_fps
+        seconds = 0.0
+        if clip.start_frame is not None and fps > 0:
+            seconds = clip.start_frame * self._inv_fps
+        with QtCore.QSignalBlocker(self.start_seconds_spin), QtCore.QSignalBlocker(self.start_frames_spin):
+            self.start_seconds_spin.setValue(seconds)
+            self.start_frames_spin.setValue(int(seconds * fps) if fps > 0 else 0)
+        self.source_offset_spin.setValue(clip.source_start_seconds)
 
     def _on_save_audio_params(self) -> None:
         """保存音频参数修改。"""
@@ -543,6 +633,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.audioFilesDropped.emit(paths, category)
 
     def _on_global_config_changed(self) -> None:
+        self._config_timer.start()
+
+    def _emit_global_config(self) -> None:
+        self._config_timer.stop()
         self.globalConfigChanged.emit(
             self.music_random_checkbox.isChecked(),
             self.music_retry_spin.value(),
@@ -556,65 +650,61 @@ class MainWindow(QtWidgets.QMainWindow):
         self._refresh_status_indicators()
 
     def _on_seconds_changed(self, value: float) -> None:
-        if self._current_video_fps > 0:
-            self.start_frames_spin.blockSignals(True)
-            self.start_frames_spin.setValue(int(value * self._current_video_fps))
-            self.start_frames_spin.blockSignals(False)
+        fps = self._current_video_fps
+        if fps > 0:
+            with QtCore.QSignalBlocker(self.start_frames_spin):
+                self.start_frames_spin.setValue(int(value * fps))
 
     def _on_frames_changed(self, value: int) -> None:
-        if self._current_video_fps > 0:
-            seconds = value / self._current_video_fps
-            self.start_seconds_spin.blockSignals(True)
-            self.start_seconds_spin.setValue(seconds)
-            self.start_seconds_spin.blockSignals(False)
+        inv_fps = self._inv_fps
+        if inv_fps > 0:
+            with QtCore.QSignalBlocker(self.start_seconds_spin):
+                self.start_seconds_spin.setValue(value * inv_fps)
 
     def _refresh_status_indicators(self) -> None:
-        clips_by_category: Dict[AudioCategory, int] = {
-            AudioCategory.SE: 0,
-            AudioCategory.VO: 0,
-            AudioCategory.MUSIC: 0,
-        }
-        for clip in self._current_audio_clips:
-            clips_by_category[clip.category] = clips_by_category.get(clip.category, 0) + 1
+        counts = self._count_audio(self._current_audio_clips)
         for category, indicator in self.status_labels.items():
-            if clips_by_category.get(category, 0) > 0:
-                indicator.setText("已匹配")
-                indicator.setStyleSheet("color: #090")
-            else:
-                indicator.setText("未匹配")
-                indicator.setStyleSheet("color: #b00")
+            self._set_indicator_state(indicator, matched=counts[category] > 0)
+
+    def _set_indicator_state(self, indicator: QtWidgets.QLabel, matched: bool) -> None:
+        """仅在状态变化时更新指示标签，避免重复解析样式表。"""
+
+        state, text, style = self._INDICATOR_STATES[matched]
+        if indicator.property("state") == state:
+            return
+        indicator.setText(text)
+        indicator.setStyleSheet(style)
+        indicator.setProperty("state", state)
 
     def _count_audio(self, clips: List[AudioClip]) -> Dict[AudioCategory, int]:
-        counts: Dict[AudioCategory, int] = {
-            AudioCategory.SE: 0,
-            AudioCategory.VO: 0,
-            AudioCategory.MUSIC: 0,
+        counter = Counter(clip.category for clip in clips)
+        return {
+            category: counter.get(category, 0)
+            for category in (AudioCategory.SE, AudioCategory.VO, AudioCategory.MUSIC)
         }
-        for clip in clips:
-            counts[clip.category] = counts.get(clip.category, 0) + 1
-        return counts
 
     def _refresh_video_row_counts(self, video_id: str) -> None:
-        for idx in range(self.video_list.topLevelItemCount()):
-            item = self.video_list.topLevelItem(idx)
-            if item.data(0, QtCore.Qt.UserRole) == video_id:
-                counts = self._count_audio(self._current_audio_clips)
-                item.setText(2, str(counts.get(AudioCategory.SE, 0)))
-                item.setText(3, str(counts.get(AudioCategory.VO, 0)))
-                item.setText(4, str(counts.get(AudioCategory.MUSIC, 0)))
-                break
+        self.video_model.update_counts(video_id, self._count_audio(self._current_audio_clips))
 
     def _trigger_batch_audio(self, category: AudioCategory) -> None:
         files, _ = QtWidgets.QFileDialog.getOpenFileNames(
             self,
             "选择要添加的音频文件",
-            str(Path.cwd()),
-            "音频文件 (*.wav *.mp3 *.flac *.aac *.ogg *.m4a);;所有文件 (*)",
+            self._last_batch_dir or str(Path.cwd()),
+            self._AUDIO_FILTER,
         )
         if not files:
             return
-        selected_ids = [item.data(0, QtCore.Qt.UserRole) for item in self.video_list.selectedItems()]
-        selected_ids = [vid for vid in selected_ids if vid]
+        self._last_batch_dir = str(Path(files[0]).parent)
+        user_role = QtCore.Qt.UserRole
+        # 单次遍历同时过滤空 ID 并按选择顺序去重
+        selected_ids = tuple(
+            dict.fromkeys(
+                vid
+                for vid in (index.data(user_role) for index in self.video_list.selectionModel().selectedRows())
+                if vid
+            )
+        )
         if not selected_ids:
             QtWidgets.QMessageBox.information(self, "提示", "请先选中要批量添加音频的视频。")
             return
@@ -0,0 +1,159 @@
+"""视频会话列表模型。
+
+以 `QAbstractItemModel` 直接包装 `MixSession` 列表，刷新时只需重置模型，
+由视图按需通过 `data()` 读取显示内容，无需为每行创建控件条目。
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from PySide6 import QtCore
+
+from video_audio_mixer_gui.models.media import AudioCategory, MixSession
+
+
+_COUNT_CATEGORIES: Tuple[AudioCategory, ...] = (AudioCategory.SE, AudioCategory.VO, AudioCategory.MUSIC)
+
+
+@dataclass(slots=True)
+class _SessionRow:
+    """模型内部的单行数据。"""
+
+    ordinal: int
+    session: MixSession
+    counts: List[int]
+
+    @property
+    def video_id(self) -> str:
+        return self.session.video_clip.clip_id
+
+
+class SessionModel(QtCore.QAbstractItemModel):
+    """视频会话列表模型，列依次为序号、视频名与 SE/VO/MUSIC 数量。"""
+
+    HEADERS: Tuple[str, ...] = ("#", "视频", "SE", "VO", "MUSIC")
+    COUNT_COLUMN_OFFSET: int = 2
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._rows: List[_SessionRow] = []
+        self._row_by_id: Dict[str, int] = {}
+        self._sort_column: int = 0
+        self._sort_order: QtCore.Qt.SortOrder = QtCore.Qt.AscendingOrder
+
+    # --- 数据更新接口 ---
+
+    def set_sessions(self, sessions: Sequence[MixSession]) -> None:
+        """替换全部会话，仅触发一次模型重置。"""
+
+        self.beginResetModel()
+        self._rows = [
+            _SessionRow(ordinal=idx, session=session, counts=self._count(session))
+            for idx, session in enumerate(sessions, start=1)
+        ]
+        self._rows.sort(key=self._sort_key(self._sort_column), reverse=self._sort_order == QtCore.Qt.DescendingOrder)
+        self._rebuild_row_index()
+        self.endResetModel()
+
+    def update_counts(self, video_id: str, counts: Dict[AudioCategory, int]) -> None:
+        """更新指定视频的音频数量，数量变化时合并为一次 dataChanged。"""
+
+        row = self._row_by_id.get(video_id)
+        if row is None:
+            return
+        new_counts = [counts.get(category, 0) for category in _COUNT_CATEGORIES]
+        if self._rows[row].counts == new_counts:
+            return
+        self._rows[row].counts = new_counts
+        top_left = self.index(row, self.COUNT_COLUMN_OFFSET)
+        bottom_right = self.index(row, len(self.HEADERS) - 1)
+        self.dataChanged.emit(top_left, bottom_right, [QtCore.Qt.DisplayRole])
+
+    def video_id(self, index: QtCore.QModelIndex) -> Optional[str]:
+        """返回索引所在行的视频 ID。"""
+
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        return self._rows[index.row()].video_id
+
+    def index_of(self, video_id: str) -> QtCore.QModelIndex:
+        """根据视频 ID 返回首列索引，不存在时返回无效索引。"""
+
+        row = self._row_by_id.get(video_id)
+        if row is None:
+            return QtCore.QModelIndex()
+        return self.index(row, 0)
+
+    # --- QAbstractItemModel 实现 ---
+
+    def index(self, row: int, column: int, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> QtCore.QModelIndex:  # type: ignore[override]
+        if parent.isValid() or not (0 <= row < len(self._rows)) or not (0 <= column < len(self.HEADERS)):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: QtCore.QModelIndex = QtCore.QModelIndex()) -> QtCore.QModelIndex:  # type: ignore[override]
+        return QtCore.QModelIndex()
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # type: ignore[override]
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # type: ignore[override]
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole) -> Any:  # type: ignore[override]
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == QtCore.Qt.UserRole:
+            return row.video_id
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        column = index.column()
+        if column == 0:
+            return str(row.ordinal)
+        if column == 1:
+            return row.session.video_clip.display_name
+        return str(row.counts[column - self.COUNT_COLUMN_OFFSET])
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.DisplayRole) -> Any:  # type: ignore[override]
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole and 0 <= section < len(self.HEADERS):
+            return self.HEADERS[section]
+        return None
+
+    def sort(self, column: int, order: QtCore.Qt.SortOrder = QtCore.Qt.AscendingOrder) -> None:  # type: ignore[override]
+        if not (0 <= column < len(self.HEADERS)):
+            return
+        self._sort_column = column
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        old_ids = [row.video_id for row in self._rows]
+        self._rows.sort(key=self._sort_key(column), reverse=order == QtCore.Qt.DescendingOrder)
+        self._rebuild_row_index()
+        # 同步持久索引，保证排序后选中状态仍指向原会话
+        old_indexes = self.persistentIndexList()
+        new_indexes = [
+            self.index(self._row_by_id[old_ids[index.row()]], index.column()) for index in old_indexes
+        ]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    # --- 内部工具 ---
+
+    def _rebuild_row_index(self) -> None:
+        self._row_by_id = {row.video_id: position for position, row in enumerate(self._rows)}
+
+    def _sort_key(self, column: int):
+        if column == 0:
+            return lambda row: row.ordinal
+        if column == 1:
+            return lambda row: row.session.video_clip.display_name.lower()
+        offset = column - self.COUNT_COLUMN_OFFSET
+        return lambda row: (row.counts[offset], row.ordinal)
+
+    @staticmethod
+    def _count(session: MixSession) -> List[int]:
+        counter = Counter(clip.category for clip in session.audio_clips)
+        return [counter.get(category, 0) for category in _COUNT_CATEGORIES]
@@ -6,11 +6,12 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
-import uuid
+import itertools
+import secrets
 
 
 class AudioCategory(Enum):
@@ -24,6 +25,10 @@ class AudioCategory(Enum):
     MUSIC = "music"
 
 
+# 会延长成片时长、需要黑屏补帧的音频类别
+_DELAY_CATEGORIES = frozenset({AudioCategory.SE, AudioCategory.VO})
+
+
 class LengthMode(Enum):
     """音乐轨道截取模式。"""
 
@@ -32,15 +37,23 @@ class LengthMode(Enum):
     FIXED_FRAMES = "fixed_frames"
 
 
+# 进程级随机前缀 + 递增计数，避免每个条目都读取系统随机源并构造 UUID 对象
+_ID_PREFIX = secrets.token_hex(4)
+_id_counter = itertools.count()
+
+
 def _generate_id() -> str:
-    """生成唯一标识符。"""
+    """生成进程内唯一的标识符。"""
 
-    return uuid.uuid4().hex
+    return f"{_ID_PREFIX}{next(_id_counter):012x}"
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class VideoClip:
-    """视频片段实体。"""
+    """视频片段实体。
+
+    导入后不再修改，设为不可变以便在仓库快照之间安全共享。
+    """
 
     file_path: Path
     display_name: str
@@ -49,28 +62,37 @@ class VideoClip:
     resolution: Tuple[int, int]
     has_audio: bool
     clip_id: str = field(default_factory=_generate_id, init=False)
+    duration_frames: int = field(init=False, repr=False, compare=False)
 
-    @property
-    def duration_frames(self) -> int:
-        """以帧为单位返回时长。"""
-
-        return int(self.duration_seconds * self.fps)
+    def __post_init__(self) -> None:
+        # 以帧为单位的时长只依赖不可变字段，构造时计算一次
+        object.__setattr__(self, "duration_frames", int(self.duration_seconds * self.fps))
 
     def to_payload(self) -> Dict[str, Any]:
         """转换为 GUI 可消费的字典。"""
 
-        payload: Dict[str, Any] = asdict(self)
-        payload["file_path"] = str(self.file_path)
-        payload["resolution"] = {
-            "width": self.resolution[0],
-            "height": self.resolution[1],
+        # 字段均为标量，直接构造字典，避免 asdict 的递归深拷贝
+        return {
+            "file_path": str(self.file_path),
+            "display_name": self.display_name,
+            "duration_seconds": self.duration_seconds,
+            "fps": self.fps,
+            "resolution": {
+                "width": self.resolution[0],
+                "height": self.resolution[1],
+            },
+            "has_audio": self.has_audio,
+            "clip_id": self.clip_id,
         }
-        return payload
 
 
-@dataclass(slots=True)
+@dataclass(slots=True, frozen=True)
 class AudioClip:
-    """音频片段实体。"""
+    """音频片段实体。
+
+    与 `VideoClip` 一样不可变，仓库快照与已构建的会话可以安全共享同一实例；
+    修改起点时通过 `with_offsets()` 生成副本。
+    """
 
     file_path: Path
     category: AudioCategory
@@ -89,6 +111,14 @@ class AudioClip:
             return 0.0
         return start_frame / fps
 
+    def with_offsets(self, start_frame: Optional[int], source_start_seconds: float) -> "AudioClip":
+        """返回修改起点后的副本，保留原有的 clip_id。"""
+
+        updated = replace(self, start_frame=start_frame, source_start_seconds=source_start_seconds)
+        # clip_id 不参与构造，replace 会生成新值，这里沿用原标识
+        object.__setattr__(updated, "clip_id", self.clip_id)
+        return updated
+
 
 @dataclass(slots=True)
 class TrackConfig:
@@ -108,13 +138,19 @@ class TrackConfig:
 
 @dataclass(slots=True)
 class MixSession:
-    """混流会话数据。"""
+    """混流会话数据。
+
+    会话是仓库在某一时刻的快照，黑屏补帧时长在首次计算后缓存。
+    音频片段不可变，修改起点会生成新片段并发布新快照，需重新获取会话；
+    仅在构建后直接增删 `audio_clips` 时才需调用 `invalidate_cache()`。
+    """
 
     video_clip: VideoClip
     audio_clips: List[AudioClip]
     config: TrackConfig
     target_output: Path
     session_id: str = field(default_factory=_generate_id, init=False)
+    _black_extension_cache: Optional[float] = field(default=None, init=False, repr=False, compare=False)
 
     def requires_black_extension(self) -> bool:
         """判断是否需要黑屏补帧。"""
@@ -136,18 +172,29 @@ class MixSession:
         }
         return summary
 
+    def invalidate_cache(self) -> None:
+        """清除派生值缓存。"""
+
+        self._black_extension_cache = None
+
     def black_extension_duration(self) -> float:
         """计算需要补齐的黑屏时长（秒）。"""
 
+        if self._black_extension_cache is not None:
+            return self._black_extension_cache
         video_duration: float = self.video_clip.duration_seconds
-        se_vo_end: float = video_duration
-        for clip in self.audio_clips:
-            if clip.category not in {AudioCategory.SE, AudioCategory.VO}:
-                continue
-            start_seconds: float = clip.start_seconds(self.video_clip.fps)
-            end_time: float = start_seconds + clip.duration_seconds
-            se_vo_end = max(se_vo_end, end_time)
-        return max(0.0, se_vo_end - video_duration)
+        fps: float = self.video_clip.fps
+        inv_fps: float = 1.0 / fps if fps > 0 else 0.0
+        se_vo_end: float = max(
+            (
+                (clip.start_frame or 0) * inv_fps + clip.duration_seconds
+                for clip in self.audio_clips
+                if clip.category in _DELAY_CATEGORIES
+            ),
+            default=video_duration,
+        )
+        self._black_extension_cache = max(0.0, se_vo_end - video_duration)
+        return self._black_extension_cache
 
 
 @dataclass(slots=True)
@@ -6,10 +6,12 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from dataclasses import replace
+from dataclasses import dataclass, replace
+from functools import lru_cache
 from pathlib import Path
 from threading import RLock
-from typing import Dict, Iterable, List
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 from video_audio_mixer_gui.models.media import (
     AudioClip,
@@ -22,165 +24,218 @@ from video_audio_mixer_gui.models.media import (
 )
 
 
+_NAME_PREFIXES = ("a1_", "a2_", "a3_", "a4_")
+_NAME_SUFFIXES = ("-mix", "_mix", "-audio", "_audio")
+
+
+def _normalize_name(stem_lower: str) -> str:
+    """标准化文件名，参考示例代码逻辑。"""
+
+    stem = stem_lower
+    for prefix in _NAME_PREFIXES:
+        if stem.startswith(prefix):
+            stem = stem[len(prefix) :]
+    return stem
+
+
+@lru_cache(maxsize=8192)
+def _name_variants(stem_lower: str) -> FrozenSet[str]:
+    """生成用于匹配的名称集合，包括原名与去前缀版本。
+
+    以小写文件名为键缓存，重复导入或重新配对时无需再次计算。
+    """
+
+    variants: set[str] = {stem_lower}
+    normalized = _normalize_name(stem_lower)
+    variants.add(normalized)
+    # 补充：去掉常见后缀如 "-mix", "_mix" 等
+    for suffix in _NAME_SUFFIXES:
+        if stem_lower.endswith(suffix):
+            variants.add(stem_lower[: -len(suffix)])
+        if normalized.endswith(suffix):
+            variants.add(normalized[: -len(suffix)])
+    return frozenset(name for name in variants if name)
+
+
+@dataclass(frozen=True, slots=True)
+class _VideoEntry:
+    """单个视频及其关联数据，总是一起读取与删除。"""
+
+    clip: VideoClip
+    audios: Tuple[AudioClip, ...]
+    config: TrackConfig
+    output_path: Path
+
+    def to_session(self) -> MixSession:
+        """转换为混流会话。"""
+
+        return MixSession(
+            video_clip=self.clip,
+            audio_clips=list(self.audios),
+            config=self.config,
+            target_output=self.output_path,
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class _RepositoryState:
+    """仓库的不可变快照，写入时整体替换，读取时无需加锁。"""
+
+    entries: Mapping[str, _VideoEntry]
+    last_unmatched_warning: Optional[str] = None
+
+
 class MediaRepository:
-    """内存中的媒体管理仓库。"""
+    """内存中的媒体管理仓库。
+
+    读取操作直接访问当前快照；写入操作在锁内基于快照构建新字典后整体发布，
+    读者总能看到某个完整一致的版本。
+    """
 
     def __init__(self, enable_limiter_default: bool = True, default_output_dir: Path | None = None) -> None:
-        self._videos: Dict[str, VideoClip] = {}
-        self._audios_by_video: Dict[str, List[AudioClip]] = defaultdict(list)
-        self._configs: Dict[str, TrackConfig] = {}
-        self._output_paths: Dict[str, Path] = {}
-        self._last_unmatched_warning: str | None = None
+        self._state = _RepositoryState(entries=MappingProxyType({}))
         self._lock = RLock()
         self._enable_limiter_default = enable_limiter_default
         self._default_output_dir = Path(default_output_dir).expanduser() if default_output_dir else None
 
     def register_import(self, result: ImportResult) -> None:
-        """注册导入结果。"""
-
+        """注册导入结果。
+
+        输出目录的解析与创建在锁外完成，锁内只做内存中的快照更新。
+        """
+
+        # 第一阶段（无锁）：为新视频准备输出路径，同一目录只创建一次
+        default_output_dir = self._default_output_dir
+        known_entries = self._state.entries
+        pending_outputs: Dict[str, Path] = {}
+        created_dirs: set[Path] = set()
+        for video in result.videos:
+            if video.clip_id in known_entries or video.clip_id in pending_outputs:
+                continue
+            target_dir = self._resolve_output_dir(video, default_output_dir)
+            if target_dir not in created_dirs:
+                target_dir.mkdir(parents=True, exist_ok=True)
+                created_dirs.add(target_dir)
+            pending_outputs[video.clip_id] = target_dir / video.file_path.name
+
+        # 第二阶段（持锁）：基于最新快照提交
         with self._lock:
+            entries = dict(self._state.entries)
             for video in result.videos:
-                self._videos[video.clip_id] = video
-                if video.clip_id not in self._configs:
-                    default_config = TrackConfig(
+                existing = entries.get(video.clip_id)
+                if existing is not None:
+                    entries[video.clip_id] = replace(existing, clip=video)
+                    continue
+                output_path = pending_outputs.get(video.clip_id)
+                if output_path is None:
+                    # 第一阶段后该视频被并发删除，极少发生，直接补建目录
+                    target_dir = self._resolve_output_dir(video, self._default_output_dir)
+                    target_dir.mkdir(parents=True, exist_ok=True)
+                    output_path = target_dir / video.file_path.name
+                entries[video.clip_id] = _VideoEntry(
+                    clip=video,
+                    audios=(),
+                    config=TrackConfig(
                         video_id=video.clip_id,
                         enable_limiter=self._enable_limiter_default,
                         music_length_mode=LengthMode.MATCH_VIDEO,
-                    )
-                    self._configs[video.clip_id] = default_config
-                    output_name = f"{video.file_path.name}"
-                    if self._default_output_dir:
-                        if self._default_output_dir.is_absolute():
-                            target_dir = self._default_output_dir
-                        else:
-                            target_dir = (video.file_path.parent / self._default_output_dir).resolve()
-                    else:
-                        target_dir = video.file_path.parent
-                    target_dir.mkdir(parents=True, exist_ok=True)
-                    self._output_paths[video.clip_id] = target_dir / output_name
+                    ),
+                    output_path=output_path,
+                )
 
-            audio_mapping = self.pair_audio_with_video(result.audios)
+            audio_mapping, warning = self._pair([entry.clip for entry in entries.values()], result.audios)
             for video_id, clips in audio_mapping.items():
-                self._audios_by_video[video_id].extend(clips)
+                entry = entries[video_id]
+                entries[video_id] = replace(entry, audios=entry.audios + tuple(clips))
+            self._publish(entries=entries, last_unmatched_warning=warning)
 
     def pair_audio_with_video(self, audio_clips: Iterable[AudioClip]) -> Dict[str, List[AudioClip]]:
         """根据文件名自动为视频匹配音频。"""
 
-        mapping: Dict[str, List[AudioClip]] = defaultdict(list)
-        unmatched: List[AudioClip] = []
-
-        with self._lock:
-            videos = list(self._videos.values())
-            video_stems = {video.clip_id: self._collect_name_variants(video.file_path) for video in videos}
-
-        for audio_clip in audio_clips:
-            audio_names = self._collect_name_variants(audio_clip.file_path)
-            matched = False
-            for video in videos:
-                video_names = video_stems[video.clip_id]
-                if video_names.intersection(audio_names):
-                    mapping[video.clip_id].append(audio_clip)
-                    matched = True
-                    break
-            if not matched:
-                unmatched.append(audio_clip)
-
+        mapping, warning = self._pair([entry.clip for entry in self._state.entries.values()], audio_clips)
         with self._lock:
-            if unmatched:
-                names = ", ".join(clip.display_name for clip in unmatched)
-                self._last_unmatched_warning = f"未匹配的音频: {names}"
-            else:
-                self._last_unmatched_warning = None
-
+            self._publish(last_unmatched_warning=warning)
         return mapping
 
     def replace_audio_list(self, video_id: str, clips: List[AudioClip]) -> None:
         """替换指定视频的音频列表。"""
 
         with self._lock:
-            self._audios_by_video[video_id] = clips
+            self._update_entry(video_id, audios=tuple(clips))
 
     def get_session(self, video_id: str) -> MixSession:
         """根据视频 ID 获取混流会话。"""
 
-        with self._lock:
-            video_clip = self._videos[video_id]
-            audios = list(self._audios_by_video.get(video_id, []))
-            config = self._configs[video_id]
-            output_path = self._output_paths[video_id]
-        return MixSession(
-            video_clip=video_clip,
-            audio_clips=audios,
-            config=config,
-            target_output=output_path,
-        )
+        return self._state.entries[video_id].to_session()
 
     def update_session_config(self, video_id: str, config: TrackConfig) -> None:
         """更新配置。"""
 
         with self._lock:
-            self._configs[video_id] = config
+            self._update_entry(video_id, config=config)
 
     def list_sessions(self) -> List[MixSession]:
         """列出所有会话。"""
 
-        with self._lock:
-            return [self.get_session(video_id) for video_id in self._videos]
+        # 只读取一次快照，所有会话来自同一版本且无需逐个查询
+        return [entry.to_session() for entry in self._state.entries.values()]
 
     def remove_video(self, video_id: str) -> None:
         """删除视频及其关联数据。"""
 
         with self._lock:
-            self._videos.pop(video_id, None)
-            self._audios_by_video.pop(video_id, None)
-            self._configs.pop(video_id, None)
-            self._output_paths.pop(video_id, None)
+            entries = dict(self._state.entries)
+            if entries.pop(video_id, None) is not None:
+                self._publish(entries=entries)
 
     def remove_audio(self, video_id: str, audio_id: str) -> None:
         """删除指定视频下的某个音频。"""
 
         with self._lock:
-            clips = self._audios_by_video.get(video_id, [])
-            self._audios_by_video[video_id] = [clip for clip in clips if clip.clip_id != audio_id]
+            entry = self._state.entries.get(video_id)
+            if entry is not None:
+                self._update_entry(video_id, audios=tuple(clip for clip in entry.audios if clip.clip_id != audio_id))
 
     def update_audio_parameters(self, video_id: str, audio_id: str, start_seconds: float, source_offset: float, fps: float) -> None:
         """更新音频起点与源偏移。"""
 
+        start_frame = int(start_seconds * fps) if fps > 0 else None
         with self._lock:
-            clips = self._audios_by_video.get(video_id, [])
-            for clip in clips:
-                if clip.clip_id == audio_id:
-                    clip.start_frame = int(start_seconds * fps) if fps > 0 else None
-                    clip.source_start_seconds = max(0.0, source_offset)
-                    break
+            entry = self._state.entries.get(video_id)
+            if entry is None:
+                return
+            audios = tuple(
+                clip.with_offsets(start_frame, max(0.0, source_offset)) if clip.clip_id == audio_id else clip
+                for clip in entry.audios
+            )
+            self._update_entry(video_id, audios=audios)
 
     def last_unmatched_warning(self) -> str | None:
         """返回最近一次未匹配音频的警告信息。"""
 
-        with self._lock:
-            return self._last_unmatched_warning
+        return self._state.last_unmatched_warning
 
     def get_audio_clips(self, video_id: str) -> List[AudioClip]:
         """返回指定视频的音频列表。"""
 
-        with self._lock:
-            return list(self._audios_by_video.get(video_id, []))
+        entry = self._state.entries.get(video_id)
+        return list(entry.audios) if entry is not None else []
 
     def add_audio_to_video(self, video_id: str, audio_clip: AudioClip, category: AudioCategory) -> None:
         """将音频加入指定视频，并强制设置类别。"""
 
         with self._lock:
-            new_clip = replace(audio_clip, category=category)
-            self._audios_by_video[video_id].append(new_clip)
+            entry = self._state.entries.get(video_id)
+            if entry is not None:
+                new_clip = replace(audio_clip, category=category)
+                self._update_entry(video_id, audios=entry.audios + (new_clip,))
 
     def set_default_enable_limiter(self, value: bool) -> None:
         """更新默认 normalize 开关并同步已有配置。"""
 
         with self._lock:
             self._enable_limiter_default = value
-            for video_id, config in self._configs.items():
-                updated = replace(config, enable_limiter=value)
-                self._configs[video_id] = updated
+            self._replace_configs(enable_limiter=value)
 
     def set_default_output_dir(self, path: Path) -> None:
         """更新默认输出目录。"""
@@ -192,34 +247,71 @@ class MediaRepository:
         """更新覆盖原音频的默认开关。"""
 
         with self._lock:
-            for video_id, config in self._configs.items():
-                self._configs[video_id] = replace(config, override_original=value)
+            self._replace_configs(override_original=value)
 
     @staticmethod
-    def _normalize_name(path: Path) -> str:
-        """标准化文件名，参考示例代码逻辑。"""
-
-        stem = path.stem.lower()
-        for prefix in ("a1_", "a2_", "a3_", "a4_"):
-            if stem.startswith(prefix):
-                stem = stem[len(prefix) :]
-        return stem
-
-    @classmethod
-    def _collect_name_variants(cls, path: Path) -> set[str]:
-        """生成用于匹配的名称集合，包括原名与去前缀版本。"""
-
-        variants: set[str] = set()
-        stem = path.stem.lower()
-        variants.add(stem)
-        normalized = cls._normalize_name(path)
-        variants.add(normalized)
-        # 补充：去掉常见后缀如 "-mix", "_mix" 等
-        for suffix in ("-mix", "_mix", "-audio", "_audio"):
-            if stem.endswith(suffix):
-                variants.add(stem[: -len(suffix)])
-            if normalized.endswith(suffix):
-                variants.add(normalized[: -len(suffix)])
-        return {name for name in variants if name}
+    def _resolve_output_dir(video: VideoClip, default_output_dir: Path | None) -> Path:
+        """计算视频的输出目录，不创建目录。"""
+
+        if not default_output_dir:
+            return video.file_path.parent
+        if default_output_dir.is_absolute():
+            return default_output_dir
+        return (video.file_path.parent / default_output_dir).resolve()
+
+    def _update_entry(self, video_id: str, **changes: object) -> None:
+        """替换单个视频条目的部分字段并发布，视频不存在时忽略，调用方需持有写锁。"""
+
+        entry = self._state.entries.get(video_id)
+        if entry is None:
+            return
+        entries = dict(self._state.entries)
+        entries[video_id] = replace(entry, **changes)
+        self._publish(entries=entries)
+
+    def _replace_configs(self, **changes: object) -> None:
+        """为所有视频生成新的配置副本并一次性发布，调用方需持有写锁。"""
+
+        entries = {
+            video_id: replace(entry, config=replace(entry.config, **changes))
+            for video_id, entry in self._state.entries.items()
+        }
+        self._publish(entries=entries)
+
+    def _publish(self, **changes: object) -> None:
+        """基于当前快照生成新快照并发布，调用方需持有写锁。"""
+
+        if "entries" in changes:
+            changes["entries"] = MappingProxyType(changes["entries"])
+        # 单次属性赋值即完成发布，读者看到的要么是旧快照要么是新快照
+        self._state = replace(self._state, **changes)
+
+    @staticmethod
+    def _pair(
+        videos: Sequence[VideoClip], audio_clips: Iterable[AudioClip]
+    ) -> Tuple[Dict[str, List[AudioClip]], Optional[str]]:
+        """按文件名为音频匹配视频，返回映射与未匹配警告。"""
+
+        mapping: Dict[str, List[AudioClip]] = defaultdict(list)
+        unmatched: List[AudioClip] = []
+
+        # 倒排索引：名称变体 -> 视频顺序，同名变体保留最先导入的视频
+        variant_index: Dict[str, int] = {}
+        for position, video in enumerate(videos):
+            for name in _name_variants(video.file_path.stem.lower()):
+                variant_index.setdefault(name, position)
 
+        for audio_clip in audio_clips:
+            positions = [
+                variant_index[name] for name in _name_variants(audio_clip.file_path.stem.lower()) if name in variant_index
+            ]
+            if positions:
+                mapping[videos[min(positions)].clip_id].append(audio_clip)
+            else:
+                unmatched.append(audio_clip)
 
+        warning: Optional[str] = None
+        if unmatched:
+            names = ", ".join(clip.display_name for clip in unmatched)
+            warning = f"未匹配的音频: {names}"
+        return mapping, warning
@@ -2,33 +2,51 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+import os
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 from uuid import uuid4
 import random
 
+from video_audio_mixer_gui.core.ffmpeg_adapter import FFmpegAdapter
+from video_audio_mixer_gui.core.logger import RichLogger
 from video_audio_mixer_gui.models.media import AudioCategory, AudioClip, MixSession
 
 
+_DEFAULT_OUTPUT_ARGS: Tuple[str, ...] = ("-c:v", "copy", "-c:a", "aac", "-b:a", "192k")
+_ADELAY_TEMPLATE = "adelay={0}|{0}"
+
+
 @dataclass(slots=True)
 class MixPlan:
     """混流计划数据结构。"""
 
     video_input: Path
     audio_inputs: List[Path] = field(default_factory=list)
+    audio_input_strs: List[str] = field(default_factory=list)
     audio_filters: List[str] = field(default_factory=list)
+    audio_filter_complex: str = ""
     output_args: List[str] = field(default_factory=list)
     needs_black_extension: bool = False
     black_extension_duration: float = 0.0
     video_resolution: tuple[int, int] = (0, 0)
     video_fps: float = 0.0
     black_clip_path: Path | None = None
-    concat_list_path: Path | None = None
     extended_video_path: Path | None = None
+    concat_content: str = ""
     audio_output_label: str = "aout"
     include_original_audio: bool = False
     amix_normalize: int = 0
 
+    def extension_paths(self) -> List[Path]:
+        """返回黑屏补帧产生的临时文件路径。"""
+
+        return [
+            path
+            for path in (self.black_clip_path, self.extended_video_path)
+            if path is not None
+        ]
+
 
 class MixPlanner:
     """根据会话构建混流计划。"""
@@ -45,13 +63,14 @@ class MixPlanner:
         audio_outputs: List[str] = []
         for index, audio_clip in enumerate(session.audio_clips):
             plan.audio_inputs.append(audio_clip.file_path)
-            final_label, filters = self._build_clip_filters(index=index, clip=audio_clip, session=session)
-            plan.audio_filters.extend(filters)
+            plan.audio_input_strs.append(os.fspath(audio_clip.file_path))
+            final_label, chain = self._build_clip_filter(index=index, clip=audio_clip, session=session)
+            plan.audio_filters.append(chain)
             audio_outputs.append(final_label)
 
         if plan.include_original_audio:
-            final_label, filters = self._build_original_filters(session)
-            plan.audio_filters.extend(filters)
+            final_label, chain = self._build_original_filter(session)
+            plan.audio_filters.append(chain)
             audio_outputs.append(final_label)
 
         if audio_outputs:
@@ -60,54 +79,45 @@ class MixPlanner:
                 f"{mix_inputs}amix=inputs={len(audio_outputs)}:normalize={plan.amix_normalize}[{plan.audio_output_label}]"
             )
 
-        plan.output_args = ["-c:v", "copy", "-c:a", "aac", "-b:a", "192k"]
-        plan.black_extension_duration = session.black_extension_duration()
-        plan.needs_black_extension = plan.black_extension_duration > 0.0
+        plan.audio_filter_complex = ";".join(plan.audio_filters)
+        plan.output_args = list(_DEFAULT_OUTPUT_ARGS)
+        black_duration = session.black_extension_duration()
+        plan.black_extension_duration = black_duration
+        plan.needs_black_extension = black_duration > 0.0
 
         if plan.needs_black_extension:
             unique_token = uuid4().hex
             base_dir = session.video_clip.file_path.parent
             stem = session.video_clip.file_path.stem
             plan.black_clip_path = base_dir / f"{stem}_black_{unique_token}.mp4"
-            plan.concat_list_path = base_dir / f"{stem}_concat_{unique_token}.txt"
             plan.extended_video_path = base_dir / f"{stem}_extended_{unique_token}.mp4"
+            # 列表经标准输入传给 ffmpeg，相对路径无从解析，统一写绝对路径
+            plan.concat_content = (
+                f"file '{plan.video_input.absolute().as_posix()}'\n"
+                f"file '{plan.black_clip_path.absolute().as_posix()}'\n"
+            )
 
         return plan
 
-    def _build_clip_filters(self, index: int, clip: AudioClip, session: MixSession) -> Tuple[str, List[str]]:
-        """为单个音频片段构建滤镜链。"""
+    def _build_clip_filter(self, index: int, clip: AudioClip, session: MixSession) -> Tuple[str, str]:
+        """为单个音频片段构建滤镜链，各步骤以逗号串联为一条链，无需中间标签。"""
 
-        filters: List[str] = []
-        current_ref = f"[{index + 1}:a]"
-        label_counter = 0
-        output_label = f"a{index}"
-
-        def next_label(suffix: str) -> str:
-            nonlocal label_counter
-            label_counter += 1
-            return f"{output_label}_{suffix}_{label_counter}"
-
-        def apply_filter(filter_expr: str) -> None:
-            nonlocal current_ref
-            new_label = next_label("flt")
-            filters.append(f"{current_ref}{filter_expr}[{new_label}]")
-            current_ref = f"[{new_label}]"
+        parts: List[str] = []
 
         # 音源起始偏移
         source_offset = clip.source_start_seconds
         if clip.category == AudioCategory.MUSIC:
             source_offset += max(0.0, session.config.music_start_offset)
             if session.config.music_random_enabled:
-                random_offset = self._random_music_offset(clip, session)
-                source_offset += random_offset
+                source_offset += self._random_music_offset(clip, session)
         if source_offset > 0:
-            apply_filter(f"atrim=start={source_offset},asetpts=PTS-STARTPTS")
+            parts.append(f"atrim=start={source_offset},asetpts=PTS-STARTPTS")
 
         # 音乐长度截断
         if clip.category == AudioCategory.MUSIC:
             trim_expr = self._music_length_trim(session)
             if trim_expr:
-                apply_filter(f"{trim_expr},asetpts=PTS-STARTPTS")
+                parts.append(f"{trim_expr},asetpts=PTS-STARTPTS")
 
         # 视频时间轴偏移 + 单独起始帧偏移
         delay_seconds = max(
@@ -115,13 +125,10 @@ class MixPlanner:
             clip.start_seconds(session.video_clip.fps) + max(0.0, session.config.video_audio_lead),
         )
         if delay_seconds > 0:
-            delay_ms = int(delay_seconds * 1000)
-            apply_filter(f"adelay={delay_ms}|{delay_ms}")
-
-        if current_ref != f"[{output_label}]":
-            filters.append(f"{current_ref}anull[{output_label}]")
+            parts.append(_ADELAY_TEMPLATE.format(int(delay_seconds * 1000)))
 
-        return output_label, filters
+        output_label = f"a{index}"
+        return output_label, f"[{index + 1}:a]{','.join(parts) or 'anull'}[{output_label}]"
 
     def _music_length_trim(self, session: MixSession) -> str | None:
         """生成音乐截断表达式。"""
@@ -137,23 +144,13 @@ class MixPlanner:
             return f"atrim=0:{seconds}"
         return None
 
-    def _build_original_filters(self, session: MixSession) -> Tuple[str, List[str]]:
+    def _build_original_filter(self, session: MixSession) -> Tuple[str, str]:
         """构建原始音频滤镜链。"""
 
-        filters: List[str] = []
-        current_ref = "[0:a]"
         output_label = "orig_audio"
-
         delay_seconds = max(0.0, session.config.video_audio_lead)
-        if delay_seconds > 0:
-            delay_ms = int(delay_seconds * 1000)
-            filters.append(f"{current_ref}adelay={delay_ms}|{delay_ms}[{output_label}_delay]")
-            current_ref = f"[{output_label}_delay]"
-
-        if current_ref != f"[{output_label}]":
-            filters.append(f"{current_ref}anull[{output_label}]")
-
-        return output_label, filters
+        expr = _ADELAY_TEMPLATE.format(int(delay_seconds * 1000)) if delay_seconds > 0 else "anull"
+        return output_label, f"[0:a]{expr}[{output_label}]"
 
     def _random_music_offset(self, clip: AudioClip, session: MixSession) -> float:
         """根据配置生成音乐随机起点。"""
@@ -164,10 +161,65 @@ class MixPlanner:
         max_start = max(total_duration - session.video_clip.duration_seconds, 0.0)
         if max_start <= 0:
             return 0.0
-        rng = random.Random(session.config.music_random_seed)
-        best_value = 0.0
-        attempts = max(session.config.music_retry_limit, 1)
-        for _ in range(attempts):
-            candidate = rng.uniform(0.0, max_start)
-            best_value = candidate
-        return best_value
+        # 取值没有额外约束，单次抽样即可，无需按重试次数反复抽取
+        return random.Random(session.config.music_random_seed).uniform(0.0, max_start)
+
+
+def prepare_extended_video(
+    plan: MixPlan,
+    adapter: FFmpegAdapter,
+    logger: RichLogger,
+    resolution: Optional[Tuple[int, int]] = None,
+    fps: Optional[float] = None,
+    log_prefix: str = "",
+) -> Optional[Path]:
+    """按需生成黑屏并拼接到视频末尾，返回用于混流的视频路径，失败时返回 None。"""
+
+    if not (plan.needs_black_extension and plan.black_clip_path and plan.extended_video_path):
+        return plan.video_input
+
+    black_result = adapter.generate_black_clip(
+        output_path=plan.black_clip_path,
+        resolution=resolution or plan.video_resolution,
+        duration=plan.black_extension_duration,
+        fps=fps if fps is not None else plan.video_fps,
+    )
+    if black_result.return_code != 0:
+        logger.log_error(f"{log_prefix}黑屏生成失败: {black_result.stderr}")
+        return None
+
+    concat_result = adapter.concat_videos(
+        output_path=plan.extended_video_path,
+        list_content=plan.concat_content,
+    )
+    if concat_result.return_code != 0:
+        logger.log_error(f"{log_prefix}视频拼接失败: {concat_result.stderr}")
+        return None
+    return plan.extended_video_path
+
+
+def assemble_command(
+    plan: MixPlan,
+    video_input: Path,
+    output_path: Path,
+    prepend: Optional[Sequence[str]] = None,
+    output_args: Optional[Sequence[str]] = None,
+) -> List[str]:
+    """组装混流 ffmpeg 参数，预览与正式混流共用。"""
+
+    command: List[str] = list(prepend) if prepend else []
+    command.extend(["-i", os.fspath(video_input)])
+    for audio_str in plan.audio_input_strs:
+        command.extend(["-i", audio_str])
+
+    if plan.audio_filter_complex:
+        command.extend(["-filter_complex", plan.audio_filter_complex])
+        command.extend(["-map", "0:v:0", "-map", f"[{plan.audio_output_label}]"])
+    elif plan.audio_inputs:
+        command.extend(["-map", "0:v:0", "-map", "1:a:0"])
+    else:
+        command.extend(["-map", "0:v:0"])
+
+    command.extend(plan.output_args if output_args is None else output_args)
+    command.append(os.fspath(output_path))
+    return command
@@ -2,16 +2,22 @@
 
 from __future__ import annotations
 
+import asyncio
 import subprocess
-import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 from video_audio_mixer_gui.core.ffmpeg_adapter import FFmpegAdapter
 from video_audio_mixer_gui.core.logger import RichLogger
 from video_audio_mixer_gui.models.media import MixSession
-from video_audio_mixer_gui.services.mix_planner import MixPlanner
+from video_audio_mixer_gui.services.mix_planner import MixPlan, MixPlanner, assemble_command, prepare_extended_video
+
+
+_PREVIEW_OUTPUT_ARGS: Tuple[str, ...] = (
+    "-c:v", "libx264", "-preset", "veryfast", "-crf", "30",
+    "-c:a", "aac", "-b:a", "128k",
+)
 
 
 @dataclass(slots=True)
@@ -39,13 +45,32 @@ class PreviewController:
     def preview(self, session: MixSession, section: PreviewSection) -> None:
         """生成临时混流并使用 ffplay 预览。"""
 
+        temp_output = self._render_preview(session, section)
+        if temp_output is None:
+            return
+        process = subprocess.Popen(self._ffplay_command(session, temp_output))
+        process.wait()
+        self._cleanup_files([temp_output])
+
+    async def preview_async(self, session: MixSession, section: PreviewSection) -> None:
+        """`preview` 的异步版本：渲染放到工作线程，ffplay 由事件循环等待，不占用调用线程。"""
+
+        temp_output = await asyncio.to_thread(self._render_preview, session, section)
+        if temp_output is None:
+            return
+        process = await asyncio.create_subprocess_exec(*self._ffplay_command(session, temp_output))
+        await process.wait()
+        self._cleanup_files([temp_output])
+
+    def _render_preview(self, session: MixSession, section: PreviewSection) -> Optional[Path]:
+        """渲染预览片段，成功时返回临时输出路径。"""
+
         preview_dir = session.video_clip.file_path.parent
         preview_dir.mkdir(parents=True, exist_ok=True)
         temp_output = preview_dir / f"preview_{session.session_id}.mp4"
 
         plan = self._planner.build_plan(session)
-        temp_intermediate = []
-        video_input = plan.video_input
+        temp_intermediate = plan.extension_paths()
 
         width, height = plan.video_resolution
         if width <= 0 or height <= 0:
@@ -58,31 +83,12 @@ class PreviewController:
         if fps <= 0:
             fps = 25.0
 
-        if plan.needs_black_extension and plan.black_clip_path and plan.concat_list_path and plan.extended_video_path:
-            temp_intermediate.extend([plan.black_clip_path, plan.concat_list_path, plan.extended_video_path])
-            result_black = self._adapter.generate_black_clip(
-                output_path=plan.black_clip_path,
-                resolution=(width, height),
-                duration=plan.black_extension_duration,
-                fps=fps,
-            )
-            if result_black.return_code != 0:
-                self._logger.log_error(f"预览黑屏生成失败: {result_black.stderr}")
-                self._cleanup_files(temp_intermediate)
-                return
-            plan.concat_list_path.write_text(
-                f"file '{plan.video_input.as_posix()}'\nfile '{plan.black_clip_path.as_posix()}'\n",
-                encoding="utf-8",
-            )
-            result_concat = self._adapter.concat_videos(
-                list_file=plan.concat_list_path,
-                output_path=plan.extended_video_path,
-            )
-            if result_concat.return_code != 0:
-                self._logger.log_error(f"预览拼接失败: {result_concat.stderr}")
-                self._cleanup_files(temp_intermediate)
-                return
-            video_input = plan.extended_video_path
+        video_input = prepare_extended_video(
+            plan, self._adapter, self._logger, resolution=(width, height), fps=fps, log_prefix="预览"
+        )
+        if video_input is None:
+            self._cleanup_files(temp_intermediate)
+            return None
 
         command = self._build_preview_command(plan, video_input, temp_output, section)
 
@@ -90,40 +96,22 @@ class PreviewController:
         self._cleanup_files(temp_intermediate)
         if result.return_code != 0:
             self._logger.log_error(f"预览混流失败: {result.stderr}")
-            return
+            return None
+        return temp_output
 
-        ffplay_command = [
+    @staticmethod
+    def _ffplay_command(session: MixSession, temp_output: Path) -> list[str]:
+        return [
             "ffplay",
             "-autoexit",
             "-window_title",
             f"预览 - {session.video_clip.display_name}",
             str(temp_output),
         ]
-        process = subprocess.Popen(ffplay_command)
-        process.wait()
-        try:
-            temp_output.unlink(missing_ok=True)
-        except OSError:
-            pass
-
-    def _build_preview_command(self, plan, video_input: Path, output_path: Path, section: PreviewSection) -> list[str]:
-        command: list[str] = []
-        command.extend(["-ss", f"{max(section.start, 0.0):.3f}"])
-        command.extend(["-t", f"{max(section.duration, 1.0):.3f}"])
-        command.extend(["-i", str(video_input)])
-        for audio_path in plan.audio_inputs:
-            command.extend(["-i", str(audio_path)])
-        if plan.audio_filters:
-            command.extend(["-filter_complex", ";".join(plan.audio_filters)])
-            command.extend(["-map", "0:v:0", "-map", f"[{plan.audio_output_label}]"])
-        elif plan.audio_inputs:
-            command.extend(["-map", "0:v:0", "-map", "1:a:0"])
-        else:
-            command.extend(["-map", "0:v:0"])
-        command.extend(["-c:v", "libx264", "-preset", "veryfast", "-crf", "30"])
-        command.extend(["-c:a", "aac", "-b:a", "128k"])
-        command.append(str(output_path))
-        return command
+
+    def _build_preview_command(self, plan: MixPlan, video_input: Path, output_path: Path, section: PreviewSection) -> list[str]:
+        prepend = ["-ss", f"{max(section.start, 0.0):.3f}", "-t", f"{max(section.duration, 1.0):.3f}"]
+        return assemble_command(plan, video_input, output_path, prepend=prepend, output_args=_PREVIEW_OUTPUT_ARGS)
 
     def _cleanup_files(self, paths: list[Path]) -> None:
         for path in paths:
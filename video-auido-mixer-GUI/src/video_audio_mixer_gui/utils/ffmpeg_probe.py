@@ -1,12 +1,47 @@
-"""封装 ffprobe 查询工具函数。"""
+"""封装 ffprobe 查询工具函数。
+
+探测结果按 (绝对路径, 文件大小, 修改时间, 探测模式) 缓存在 sqlite 中，文件未变化时
+不再启动 ffprobe 进程；进程内再叠加一层 LRU 缓存避免重复查询数据库。
+"""
 
 from __future__ import annotations
 
+import asyncio
 import json
+import os
+import sqlite3
 import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from video_audio_mixer_gui.utils.path_utils import FileRecord
+
+try:
+    import av
+except ImportError:  # PyAV 为可选依赖，缺失时始终使用 ffprobe 子进程
+    av = None
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson 为可选依赖，标准库 json 同样接受 bytes
+    from json import loads as _json_loads
+
+
+PROBE_CACHE_PATH: Path = Path.home() / ".video_audio_mixer_gui" / "probe_cache.sqlite3"
+
+# 所需信息均位于容器头部，限制 ffprobe 的读取量；遇到特殊封装时可设置 FAST_PROBE=0 关闭
+FAST_PROBE: bool = os.environ.get("FAST_PROBE", "1") != "0"
+_FAST_PROBE_ARGS: Tuple[str, ...] = ("-probesize", "500000", "-analyzeduration", "100000")
+_FFPROBE_BASE: Tuple[str, ...] = ("ffprobe", "-v", "error")
+# 缓存表结构版本，表结构变化时递增
+_CACHE_SCHEMA_VERSION = 1
+# CREATE_NO_WINDOW 仅在 Windows 上存在
+_CREATION_FLAGS: int = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
 
 
 @dataclass(slots=True)
@@ -28,98 +63,312 @@ class AudioMetadata:
     sample_rate: int
 
 
-def probe_video(path: Path) -> Optional[VideoMetadata]:
-    """使用 ffprobe 获取视频信息。"""
+class _ProbeCache:
+    """基于 sqlite 的 ffprobe 输出缓存，首次使用时才打开数据库。"""
 
-    command = [
-        "ffprobe",
-        "-v",
-        "error",
-        "-select_streams",
-        "v:0",
-        "-show_entries",
-        "stream=r_frame_rate,width,height",
-        "-show_entries",
-        "format=duration",
-        "-of",
-        "json",
-        str(path),
+    def __init__(self, db_path: Optional[Path]) -> None:
+        self._db_path = db_path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def get(self, path: str, size: int, mtime_ns: int, fast_probe: bool) -> Optional[bytes]:
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return None
+            row = connection.execute(
+                "SELECT payload FROM probe_cache WHERE path = ? AND fast_probe = ? AND size = ? AND mtime_ns = ?",
+                (path, int(fast_probe), size, mtime_ns),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, path: str, size: int, mtime_ns: int, fast_probe: bool, payload: bytes) -> None:
+        with self._lock:
+            connection = self._connect()
+            if connection is None:
+                return
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO probe_cache (path, fast_probe, size, mtime_ns, payload) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (path, int(fast_probe), size, mtime_ns, payload),
+                )
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._connection is None and self._db_path is not None:
+            try:
+                self._db_path.parent.mkdir(parents=True, exist_ok=True)
+                connection = sqlite3.connect(str(self._db_path), check_same_thread=False)
+                with connection:
+                    if connection.execute("PRAGMA user_version").fetchone()[0] < _CACHE_SCHEMA_VERSION:
+                        # 旧表不区分探测模式，无法判断条目来源，直接丢弃
+                        connection.execute("DROP TABLE IF EXISTS probe_cache")
+                        connection.execute(f"PRAGMA user_version = {_CACHE_SCHEMA_VERSION}")
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS probe_cache (path TEXT, fast_probe INTEGER, size INTEGER, "
+                        "mtime_ns INTEGER, payload BLOB, PRIMARY KEY (path, fast_probe))"
+                    )
+            except (OSError, sqlite3.Error):
+                # 缓存不可用时退化为直接调用 ffprobe
+                self._db_path = None
+                return None
+            self._connection = connection
+        return self._connection
+
+
+_probe_cache = _ProbeCache(PROBE_CACHE_PATH)
+
+
+def set_probe_cache_path(db_path: Optional[Path]) -> None:
+    """更换持久化缓存位置，传入 None 时仅使用进程内缓存。"""
+
+    global _probe_cache
+    _probe_cache = _ProbeCache(db_path)
+    _probe_cached.cache_clear()
+
+
+class ProbePool:
+    """常驻的 PyAV 探测线程池。
+
+    PyAV 打开容器与读取流信息时会释放 GIL，线程即可并行；不使用进程池，
+    避免打包后的程序在子进程中重新启动界面，也避免从已有 Qt 线程的进程 fork。
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers or os.cpu_count() or 1))
+
+    def probe_all(self, paths: Sequence[str]) -> List[Optional[bytes]]:
+        """批量探测，结果顺序与输入一致。"""
+
+        return list(self._executor.map(_av_probe, paths))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_probe_pool: Optional[ProbePool] = None
+_probe_pool_lock = threading.Lock()
+
+
+def _get_probe_pool() -> Optional[ProbePool]:
+    """未安装 PyAV 时返回 None，由调用方回退到 ffprobe 子进程。"""
+
+    global _probe_pool
+    if av is None:
+        return None
+    with _probe_pool_lock:
+        if _probe_pool is None:
+            _probe_pool = ProbePool()
+        return _probe_pool
+
+
+def shutdown_probe_pool() -> None:
+    """关闭探测线程池。"""
+
+    global _probe_pool
+    with _probe_pool_lock:
+        if _probe_pool is not None:
+            _probe_pool.close()
+            _probe_pool = None
+
+
+def _av_probe(path: str) -> Optional[bytes]:
+    """用 PyAV 读取容器头信息（不解码），失败时返回 None。"""
+
+    try:
+        with av.open(path) as container:
+            streams: List[Dict[str, Any]] = []
+            for stream in container.streams:
+                if stream.type == "video":
+                    rate = stream.average_rate or stream.base_rate
+                    streams.append(
+                        {
+                            "codec_type": "video",
+                            "r_frame_rate": f"{rate.numerator}/{rate.denominator}" if rate else "0",
+                            "width": stream.width,
+                            "height": stream.height,
+                        }
+                    )
+                elif stream.type == "audio":
+                    streams.append({"codec_type": "audio", "sample_rate": stream.sample_rate})
+            duration = container.duration / av.time_base if container.duration else 0.0
+    except Exception:  # noqa: BLE001 - 特殊格式交给 ffprobe 再试一次
+        return None
+    return json.dumps({"streams": streams, "format": {"duration": duration}}).encode("utf-8")
+
+
+def probe_media(path: Union[Path, FileRecord]) -> Tuple[Optional[VideoMetadata], Optional[AudioMetadata]]:
+    """获取首个视频流与首个音频流信息，文件未变化时直接使用缓存。"""
+
+    key = _stat_key(path)
+    if key is None:
+        return None, None
+    # 快速探测可能得到不同的结果，探测模式也是缓存键的一部分
+    return _probe_cached(*key, FAST_PROBE)
+
+
+def _stat_key(path: Union[Path, FileRecord]) -> Optional[Tuple[str, int, int]]:
+    """返回缓存键 (绝对路径, 大小, 修改时间)，文件不可访问时返回 None。
+
+    传入 `FileRecord` 时直接复用遍历阶段的 stat 结果。
+    """
+
+    if isinstance(path, FileRecord):
+        return os.path.abspath(path.path), path.size, path.mtime_ns
+    absolute = os.path.abspath(path)
+    try:
+        stat = os.stat(absolute)
+    except OSError:
+        return None
+    return absolute, stat.st_size, stat.st_mtime_ns
+
+
+@lru_cache(maxsize=1024)
+def _probe_cached(
+    path: str, size: int, mtime_ns: int, fast_probe: bool
+) -> Tuple[Optional[VideoMetadata], Optional[AudioMetadata]]:
+    """按 (路径, 大小, 修改时间, 探测模式) 缓存的探测入口。"""
+
+    payload = _probe_cache.get(path, size, mtime_ns, fast_probe)
+    if payload is None:
+        # 单个文件直接在进程内读取容器头，省去子进程与进程间通信开销
+        payload = _av_probe(path) if av is not None else None
+        if payload is None:
+            payload = _run_ffprobe(path, fast_probe)
+        if payload is None:
+            return None, None
+        _probe_cache.put(path, size, mtime_ns, fast_probe, payload)
+    return _parse_probe_payload(_json_loads(payload))
+
+
+def probe_many(
+    paths: Iterable[Union[Path, FileRecord]], concurrency: Optional[int] = None
+) -> List[Tuple[Optional[VideoMetadata], Optional[AudioMetadata]]]:
+    """批量探测多个文件，结果顺序与输入一致。
+
+    优先交给 PyAV 探测线程池；未安装 PyAV 或其无法解析的文件，
+    以信号量限制并发数调用 ffprobe（ffprobe 不支持一次处理多个文件）。
+    """
+
+    fast_probe = FAST_PROBE
+    keys = [_stat_key(path) for path in paths]
+    payloads: List[Optional[bytes]] = [
+        _probe_cache.get(*key, fast_probe) if key is not None else None for key in keys
     ]
-    return _run_video_probe(command)
+    pending = [index for index, key in enumerate(keys) if key is not None and payloads[index] is None]
+    fetched = set(pending)
 
+    pool = _get_probe_pool()
+    if pool is not None and pending:
+        for index, payload in zip(pending, pool.probe_all([keys[index][0] for index in pending])):
+            payloads[index] = payload
+        pending = [index for index in pending if payloads[index] is None]
+    if pending:
+        limit = max(1, concurrency or os.cpu_count() or 1)
+        outputs = asyncio.run(_run_ffprobe_many([keys[index][0] for index in pending], limit, fast_probe))
+        for index, payload in zip(pending, outputs):
+            payloads[index] = payload
 
-def probe_audio(path: Path) -> Optional[AudioMetadata]:
-    """使用 ffprobe 获取音频信息。"""
+    results: List[Tuple[Optional[VideoMetadata], Optional[AudioMetadata]]] = []
+    for index, (key, payload) in enumerate(zip(keys, payloads)):
+        if key is None or payload is None:
+            results.append((None, None))
+            continue
+        if index in fetched:
+            _probe_cache.put(*key, fast_probe, payload)
+        results.append(_parse_probe_payload(_json_loads(payload)))
+    return results
 
-    command = [
-        "ffprobe",
-        "-v",
-        "error",
-        "-select_streams",
-        "a:0",
-        "-show_entries",
-        "stream=sample_rate",
+
+async def _run_ffprobe_many(paths: List[str], concurrency: int, fast_probe: bool) -> List[Optional[bytes]]:
+    semaphore = asyncio.Semaphore(concurrency)
+    return list(await asyncio.gather(*(_run_ffprobe_async(path, semaphore, fast_probe) for path in paths)))
+
+
+async def _run_ffprobe_async(path: str, semaphore: asyncio.Semaphore, fast_probe: bool) -> Optional[bytes]:
+    """异步调用 ffprobe，返回 JSON 字节串，失败时返回 None。"""
+
+    async with semaphore:
+        process = await asyncio.create_subprocess_exec(
+            *_ffprobe_command(path, fast_probe),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            creationflags=_CREATION_FLAGS,
+        )
+        stdout, _stderr = await process.communicate()
+    if process.returncode != 0:
+        return None
+    return stdout
+
+
+def _ffprobe_command(path: str, fast_probe: bool) -> List[str]:
+    return [
+        *_FFPROBE_BASE,
+        *(_FAST_PROBE_ARGS if fast_probe else ()),
         "-show_entries",
-        "format=duration",
+        "stream=codec_type,r_frame_rate,width,height,sample_rate:format=duration",
         "-of",
         "json",
-        str(path),
+        path,
     ]
-    return _run_audio_probe(command)
 
 
-def _run_video_probe(command: list[str]) -> Optional[VideoMetadata]:
-    process = subprocess.Popen(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        encoding="utf-8",
-        creationflags=subprocess.CREATE_NO_WINDOW,
+def _run_ffprobe(path: str, fast_probe: bool) -> Optional[bytes]:
+    """单次调用 ffprobe，返回 JSON 字节串，失败时返回 None。"""
+
+    completed = subprocess.run(
+        _ffprobe_command(path, fast_probe),
+        capture_output=True,
+        creationflags=_CREATION_FLAGS,
     )
-    stdout, _stderr = process.communicate()
-    if process.returncode != 0:
+    if completed.returncode != 0:
         return None
-    payload = json.loads(stdout)
-    duration = float(payload["format"].get("duration", 0.0))
+    return completed.stdout
+
+
+def probe_video(path: Union[Path, FileRecord]) -> Optional[VideoMetadata]:
+    """使用 ffprobe 获取视频信息。"""
+
+    return probe_media(path)[0]
+
+
+def probe_audio(path: Union[Path, FileRecord]) -> Optional[AudioMetadata]:
+    """使用 ffprobe 获取音频信息。"""
+
+    return probe_media(path)[1]
+
+
+def _parse_probe_payload(payload: Dict[str, Any]) -> Tuple[Optional[VideoMetadata], Optional[AudioMetadata]]:
+    """从 ffprobe JSON 输出中按流类型构建元数据。"""
+
+    duration = float(payload.get("format", {}).get("duration", 0.0))
     streams = payload.get("streams", [])
     video_stream = next((s for s in streams if s.get("codec_type") == "video"), None)
     audio_stream = next((s for s in streams if s.get("codec_type") == "audio"), None)
-    if video_stream is None:
-        return None
-    fps_value = stream["r_frame_rate"]
-    if "/" in fps_value:
-        numerator, denominator = fps_value.split("/")
-        fps = float(numerator) / max(float(denominator), 1.0)
-    else:
-        fps = float(fps_value)
-    return VideoMetadata(
-        duration_seconds=duration,
-        fps=fps,
-        width=int(video_stream.get("width", 0)),
-        height=int(video_stream.get("height", 0)),
-        has_audio=audio_stream is not None,
-    )
 
+    video: Optional[VideoMetadata] = None
+    if video_stream is not None:
+        video = VideoMetadata(
+            duration_seconds=duration,
+            fps=_parse_fps(video_stream.get("r_frame_rate", "0")),
+            width=int(video_stream.get("width", 0)),
+            height=int(video_stream.get("height", 0)),
+            has_audio=audio_stream is not None,
+        )
+    audio: Optional[AudioMetadata] = None
+    if audio_stream is not None:
+        audio = AudioMetadata(
+            duration_seconds=duration,
+            sample_rate=int(audio_stream.get("sample_rate", 0)),
+        )
+    return video, audio
 
-def _run_audio_probe(command: list[str]) -> Optional[AudioMetadata]:
-    process = subprocess.Popen(
-        command,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        encoding="utf-8",
-        creationflags=subprocess.CREATE_NO_WINDOW,
-    )
-    stdout, _stderr = process.communicate()
-    if process.returncode != 0:
-        return None
-    payload = json.loads(stdout)
-    duration = float(payload["format"]["duration"])
-    stream = payload["streams"][0]
-    return AudioMetadata(
-        duration_seconds=duration,
-        sample_rate=int(stream["sample_rate"]),
-    )
 
+@lru_cache(maxsize=64)
+def _parse_fps(fps_value: str) -> float:
+    """解析 `30000/1001` 形式的帧率，常见取值只有少数几种，结果直接缓存。"""
 
+    if "/" in fps_value:
+        numerator, denominator = fps_value.split("/", 1)
+        return int(numerator) / max(int(denominator), 1)
+    return float(fps_value)
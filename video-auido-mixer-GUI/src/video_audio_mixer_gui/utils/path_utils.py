@@ -5,43 +5,80 @@
 
 from __future__ import annotations
 
+import os
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
+from stat import S_ISDIR, S_ISREG
+from typing import Iterable, Iterator
 
 
 VIDEO_EXTENSIONS: tuple[str, ...] = (".mp4", ".mov", ".mkv", ".avi")
 AUDIO_EXTENSIONS: tuple[str, ...] = (".wav", ".mp3", ".flac", ".ogg", ".aac")
 
+VIDEO_SUFFIXES: frozenset[str] = frozenset(VIDEO_EXTENSIONS)
+AUDIO_SUFFIXES: frozenset[str] = frozenset(AUDIO_EXTENSIONS)
+MEDIA_SUFFIXES: frozenset[str] = VIDEO_SUFFIXES | AUDIO_SUFFIXES
 
-def iter_media_files(paths: Iterable[Path]) -> List[Path]:
-    """遍历路径列表，返回所有媒体文件路径。"""
 
-    collected: List[Path] = []
+@dataclass(slots=True, frozen=True)
+class FileRecord:
+    """遍历时一次 stat 得到的文件信息，供探测缓存与类型判断复用。"""
+
+    path: str
+    size: int
+    mtime_ns: int
+    suffix: str
+
+    @classmethod
+    def from_stat(cls, path: str, stat: os.stat_result) -> "FileRecord":
+        return cls(
+            path=path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            suffix=os.path.splitext(path)[1].lower(),
+        )
+
+
+def iter_media_files(paths: Iterable[Path]) -> Iterator[FileRecord]:
+    """遍历路径列表，逐个产出媒体文件记录。"""
+
     for path in paths:
-        if path.is_dir():
-            for child in path.rglob("*"):
-                if child.is_file() and is_supported_media(child):
-                    collected.append(child)
-        elif path.is_file() and is_supported_media(path):
-            collected.append(path)
-    return collected
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        if S_ISDIR(stat.st_mode):
+            yield from _walk_media(os.fspath(path))
+        elif S_ISREG(stat.st_mode) and is_supported_media(path):
+            yield FileRecord.from_stat(os.fspath(path), stat)
+
+
+def _walk_media(directory: str) -> Iterator[FileRecord]:
+    """用 scandir 递归遍历目录，复用 DirEntry 缓存的文件类型避免重复 stat。"""
+
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_media(entry.path)
+            elif os.path.splitext(entry.name)[1].lower() in MEDIA_SUFFIXES and entry.is_file():
+                yield FileRecord.from_stat(entry.path, entry.stat())
 
 
 def is_video(path: Path) -> bool:
     """判断是否为支持的视频文件。"""
 
-    return path.suffix.lower() in VIDEO_EXTENSIONS
+    return path.suffix.lower() in VIDEO_SUFFIXES
 
 
 def is_audio(path: Path) -> bool:
     """判断是否为支持的音频文件。"""
 
-    return path.suffix.lower() in AUDIO_EXTENSIONS
+    return path.suffix.lower() in AUDIO_SUFFIXES
 
 
 def is_supported_media(path: Path) -> bool:
     """判断是否为支持的媒体文件。"""
 
-    return is_video(path) or is_audio(path)
+    return path.suffix.lower() in MEDIA_SUFFIXES
 
 
@@ -0,0 +1,91 @@
+"""ffmpeg_probe 解析与缓存相关测试。"""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from video_audio_mixer_gui.utils import ffmpeg_probe
+from video_audio_mixer_gui.utils.ffmpeg_probe import _ProbeCache, _parse_fps, _parse_probe_payload
+
+
+def make_payload(name: str) -> bytes:
+    return json.dumps(
+        {
+            "streams": [
+                {"codec_type": "video", "r_frame_rate": "30000/1001", "width": 1920, "height": 1080},
+                {"codec_type": "audio", "sample_rate": "48000"},
+            ],
+            "format": {"duration": str(len(name))},
+        }
+    ).encode("utf-8")
+
+
+@pytest.fixture()
+def probe_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> _ProbeCache:
+    cache = _ProbeCache(tmp_path / "probe_cache.sqlite3")
+    monkeypatch.setattr(ffmpeg_probe, "_probe_cache", cache)
+    return cache
+
+
+def test_parse_probe_payload() -> None:
+    video, audio = _parse_probe_payload(json.loads(make_payload("demo")))
+
+    assert video is not None and audio is not None
+    assert video.duration_seconds == 4.0
+    assert video.fps == pytest.approx(29.97, abs=0.01)
+    assert (video.width, video.height) == (1920, 1080)
+    assert video.has_audio
+    assert audio.sample_rate == 48000
+
+
+def test_parse_probe_payload_audio_only() -> None:
+    video, audio = _parse_probe_payload({"streams": [{"codec_type": "audio", "sample_rate": "44100"}]})
+
+    assert video is None
+    assert audio is not None and audio.duration_seconds == 0.0
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("30000/1001", 30000 / 1001), ("0/0", 0.0), ("25", 25.0)],
+)
+def test_parse_fps(value: str, expected: float) -> None:
+    assert _parse_fps(value) == pytest.approx(expected)
+
+
+def test_probe_cache_invalidated_by_size_mtime_and_mode(probe_cache: _ProbeCache) -> None:
+    probe_cache.put("/media/demo.mp4", 100, 1, True, b"payload")
+
+    assert probe_cache.get("/media/demo.mp4", 100, 1, True) == b"payload"
+    assert probe_cache.get("/media/demo.mp4", 101, 1, True) is None
+    assert probe_cache.get("/media/demo.mp4", 100, 2, True) is None
+    assert probe_cache.get("/media/demo.mp4", 100, 1, False) is None
+
+
+def test_probe_many_keeps_input_order(
+    tmp_path: Path, probe_cache: _ProbeCache, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    paths = []
+    for name in ("c", "aaa", "bb"):
+        path = tmp_path / f"{name}.mp4"
+        path.write_bytes(b"")
+        paths.append(path)
+    missing = tmp_path / "missing.mp4"
+
+    async def fake_run(path: str, semaphore: asyncio.Semaphore, fast_probe: bool) -> Optional[bytes]:
+        # 名字越短完成越晚，确保结果顺序不依赖完成顺序
+        await asyncio.sleep(0.01 / len(Path(path).stem))
+        return make_payload(Path(path).stem)
+
+    monkeypatch.setattr(ffmpeg_probe, "_get_probe_pool", lambda: None)
+    monkeypatch.setattr(ffmpeg_probe, "_run_ffprobe_async", fake_run)
+
+    results = ffmpeg_probe.probe_many([paths[0], missing, paths[1], paths[2]])
+
+    durations: List[Optional[float]] = [video.duration_seconds if video else None for video, _ in results]
+    assert durations == [1.0, None, 3.0, 2.0]
+    stat = paths[1].stat()
+    assert probe_cache.get(str(paths[1]), stat.st_size, stat.st_mtime_ns, ffmpeg_probe.FAST_PROBE) is not None
@@ -63,3 +63,31 @@ def test_update_audio_parameters(repo: MediaRepository) -> None:
     updated = repo.get_session(session.video_clip.clip_id).audio_clips[0]
     assert updated.start_frame == pytest.approx(int(1.5 * video.fps))
     assert updated.source_start_seconds == pytest.approx(0.3)
+    assert updated.clip_id == session.audio_clips[0].clip_id
+    # 之前取得的会话仍是旧快照
+    assert session.audio_clips[0].start_frame is None
+
+
+def test_black_extension_follows_audio_offset_edits(repo: MediaRepository) -> None:
+    video = make_video("demo")
+    audio = make_audio("demo.wav", AudioCategory.VO, duration=6.0)
+    repo.register_import(ImportResult(videos=[video], audios=[audio]))
+    before = repo.get_session(video.clip_id)
+    assert before.black_extension_duration() == pytest.approx(1.0)
+
+    repo.update_audio_parameters(video.clip_id, audio.clip_id, start_seconds=2.0, source_offset=0.0, fps=video.fps)
+
+    assert repo.get_session(video.clip_id).black_extension_duration() == pytest.approx(3.0)
+    assert before.black_extension_duration() == pytest.approx(1.0)
+
+
+def test_pair_audio_prefers_first_matching_video(repo: MediaRepository) -> None:
+    first = make_video("demo_mix")
+    second = make_video("demo")
+    audio = make_audio("a2_demo_mix.wav", AudioCategory.SE)
+    orphan = make_audio("other.wav", AudioCategory.VO)
+    repo.register_import(ImportResult(videos=[first, second], audios=[audio, orphan]))
+
+    assert [clip.display_name for clip in repo.get_audio_clips(first.clip_id)] == ["a2_demo_mix.wav"]
+    assert repo.get_audio_clips(second.clip_id) == []
+    assert repo.last_unmatched_warning() == "未匹配的音频: other.wav"
@@ -5,7 +5,7 @@ from pathlib import Path
 import pytest
 
 from video_audio_mixer_gui.models.media import AudioCategory, AudioClip, MixSession, TrackConfig, VideoClip, LengthMode
-from video_audio_mixer_gui.services.mix_planner import MixPlanner
+from video_audio_mixer_gui.services.mix_planner import MixPlanner, assemble_command
 
 
 @pytest.fixture()
@@ -72,3 +72,14 @@ def test_music_random_offset(planner: MixPlanner) -> None:
     filters = ";".join(plan.audio_filters)
     assert "amix" in filters
     assert "normalize=1" in filters
+
+
+def test_assemble_command(planner: MixPlanner) -> None:
+    session = make_session()
+    plan = planner.build_plan(session)
+    command = assemble_command(plan, Path("ext.mp4"), Path("final.mp4"), prepend=["-ss", "1.000"])
+    assert command[:4] == ["-ss", "1.000", "-i", "ext.mp4"]
+    assert command[command.index("-filter_complex") + 1] == plan.audio_filter_complex
+    assert command[-1] == "final.mp4"
+    assert command[-1 - len(plan.output_args):-1] == plan.output_args
+
@@ -1,7 +1,8 @@
 """PreviewController 测试。"""
 
+import asyncio
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -58,3 +59,21 @@ def test_preview_generates_temp_file(tmp_path: Path) -> None:
 
     assert adapter.run_command.called
     popen_mock.assert_called()
+
+
+def test_preview_async_awaits_player(tmp_path: Path) -> None:
+    planner = MixPlanner()
+    adapter = MagicMock(spec=FFmpegAdapter)
+    adapter.run_command.return_value = FFmpegResult(return_code=0, stdout="", stderr="")
+    controller = PreviewController(planner=planner, adapter=adapter, logger=RichLogger())
+    session = make_session(tmp_path)
+
+    process_mock = MagicMock()
+    process_mock.wait = AsyncMock(return_value=0)
+    with patch("asyncio.create_subprocess_exec", AsyncMock(return_value=process_mock)) as exec_mock:
+        asyncio.run(controller.preview_async(session, PreviewSection(start=0.0, duration=3.0)))
+
+    assert adapter.run_command.called
+    assert exec_mock.await_args.args[0] == "ffplay"
+    process_mock.wait.assert_awaited()
+
@@ -1,21 +1,38 @@
 # -*- coding: utf-8 -*-
 import os
 import sys
+import json
 import subprocess
+import shutil
 import logging
 import time
 import traceback
+import functools
+import threading
+import tempfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
 import argparse
 
+try:
+    import ahocorasick  # 可选依赖 pyahocorasick，未安装时退回逐个子串匹配
+except ImportError:
+    ahocorasick = None
+
 # --- 配置区 ---
 SCRIPT_NAME = "xy_SingleAudio_ReplaceOriginal"
 SCRIPT_VERSION = "1.0.0"
-MAX_WORKERS = os.cpu_count() or 4
+MAX_WORKERS = max(1, (os.cpu_count() or 4) // 2)  # ffmpeg 自身多线程，任务并发取核心数的一半
+FFMPEG_THREADS = None  # 每个 ffmpeg 进程的线程数，由 main() 按并发数设置
+FFMPEG_PARALLEL = MAX_WORKERS  # 同时运行的 ffmpeg 进程上限，默认与任务并发数一致；ffprobe 不受限
 OUTPUT_MIX_DIR = "~mix"   # Folder name in current directory
 DEFAULT_ENCODING = 'utf-8'
-VIDEO_EXTENSIONS = ['.mp4', '.mov', '.mkv', '.avi', '.flv'] # Supported video formats
+# 启动时解析一次 ffmpeg/ffprobe 的绝对路径，避免每次启动子进程都搜索 PATH (Windows 下还要遍历 PATHEXT)
+FFMPEG_BIN = shutil.which('ffmpeg') or 'ffmpeg'
+FFPROBE_BIN = shutil.which('ffprobe') or 'ffprobe'
+FAST_PROBE = os.environ.get('FAST_PROBE', '1') != '0'  # 只读容器头部信息；特殊封装可设 FAST_PROBE=0 关闭
+VIDEO_EXTENSIONS = frozenset(('.mp4', '.mov', '.mkv', '.avi', '.flv')) # Supported video formats
 
 # --- 日志配置 ---
 root_logger = logging.getLogger()
@@ -34,25 +51,43 @@ if not root_logger.hasHandlers():
 
 # --- 核心函数 ---
 
-def run_command(cmd, command_name="外部命令"):
-    """执行外部命令并捕获其输出的通用函数。"""
+@dataclass(slots=True, frozen=True)
+class AudioInput:
+    """在 main() 中一次性解析好的音频输入路径，任务内直接读取属性而不再反复拆分路径。"""
+    abs_path: str
+    basename: str
+    stem: str
+    search_dir: str  # 视频所在目录，即音频目录的上一级
+
+    @classmethod
+    def from_path(cls, path):
+        abs_path = os.path.abspath(path)
+        basename = os.path.basename(abs_path)
+        return cls(abs_path, basename, os.path.splitext(basename)[0], os.path.dirname(os.path.dirname(abs_path)))
+
+FFMPEG_SEM = threading.Semaphore(FFMPEG_PARALLEL)
+
+def run_command(cmd, command_name="外部命令", input_text=None):
+    """执行外部命令并捕获其输出的通用函数，input_text 非空时写入标准输入。
+    标准输出/错误以原始字节返回 (ffprobe 的 JSON 可直接交给 json.loads)，仅在记录日志时解码。"""
     logging.debug(f"正在执行 {command_name} 命令: {' '.join(cmd)}")
     try:
         creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
         process = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-            encoding=DEFAULT_ENCODING, errors='replace', creationflags=creationflags
+            cmd, stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=creationflags
         )
-        stdout, stderr = process.communicate()
+        stdout, stderr = process.communicate(input=input_text.encode(DEFAULT_ENCODING) if input_text is not None else None)
         return_code = process.poll()
 
-        if stdout: logging.debug(f"{command_name} 标准输出:\n{stdout.strip()}")
-        if stderr: logging.debug(f"{command_name} 标准错误输出:\n{stderr.strip()}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            if stdout: logging.debug(f"{command_name} 标准输出:\n{stdout.decode(DEFAULT_ENCODING, errors='replace').strip()}")
+            if stderr: logging.debug(f"{command_name} 标准错误输出:\n{stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
 
         if return_code != 0:
             logging.error(f"{command_name} 命令执行失败，返回码: {return_code}")
             if stderr and not stdout:
-                logging.error(f"错误详情 (标准错误输出): {stderr.strip()}")
+                logging.error(f"错误详情 (标准错误输出): {stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
             elif stderr:
                  logging.error(f"(更详细的错误信息可能在DEBUG日志中)")
         else:
@@ -66,54 +101,134 @@ def run_command(cmd, command_name="外部命令"):
         logging.error(traceback.format_exc())
         return None, None, None
 
-def run_ffprobe(input_file, show_entries, stream_type='v', stream_index=0, format_option='default=noprint_wrappers=1:nokey=1'):
-    """使用 ffprobe 获取媒体文件信息。"""
-    cmd = ['ffprobe', '-v', 'error', '-select_streams', f'{stream_type}:{stream_index}',
-           '-show_entries', show_entries, '-of', format_option, input_file]
+def run_silent(cmd, command_name="外部命令", input_text=None):
+    """执行不需要标准输出的外部命令 (如 ffmpeg)，返回返回码，启动失败时返回 None。
+    标准输出直接丢弃，标准错误以字节读取，仅在失败或 DEBUG 日志开启时解码。"""
+    logging.debug(f"正在执行 {command_name} 命令: {' '.join(cmd)}")
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    stdin_kwargs = {'input': input_text.encode(DEFAULT_ENCODING)} if input_text is not None else {'stdin': subprocess.DEVNULL}
+    try:
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        result = subprocess.run(
+            cmd, stdout=subprocess.PIPE if debug else subprocess.DEVNULL, stderr=subprocess.PIPE,
+            creationflags=creationflags, **stdin_kwargs
+        )
+    except FileNotFoundError:
+        logging.error(f"{command_name} 命令 '{cmd[0]}' 未找到。请确保 FFmpeg/FFprobe 已安装并配置在系统PATH中。")
+        return None
+    except Exception as e:
+        logging.error(f"执行 {command_name} 时发生未知异常: {e}")
+        logging.error(traceback.format_exc())
+        return None
+
+    if result.returncode != 0:
+        logging.error(f"{command_name} 命令执行失败，返回码: {result.returncode}")
+        if result.stderr:
+            logging.error(f"错误详情 (标准错误输出): {result.stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
+    elif debug:
+        if result.stdout: logging.debug(f"{command_name} 标准输出:\n{result.stdout.decode(DEFAULT_ENCODING, errors='replace').strip()}")
+        if result.stderr: logging.debug(f"{command_name} 标准错误输出:\n{result.stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
+        logging.debug(f"{command_name} 命令执行成功。")
+    return result.returncode
+
+def probe_all(input_file):
+    """一次调用 ffprobe 获取时长及首个视频流的宽/高/帧率/像素宽高比，失败时返回 None。"""
+    cmd = [FFPROBE_BIN, '-v', 'error',
+           *(['-probesize', '500000', '-analyzeduration', '100000'] if FAST_PROBE else []),
+           '-select_streams', 'v:0',
+           '-show_entries', 'stream=width,height,r_frame_rate,sample_aspect_ratio:format=duration', '-of', 'json', input_file]
     return_code, stdout, stderr = run_command(cmd, "ffprobe")
-    return stdout.strip() if return_code == 0 and stdout is not None else None
-
-def run_ffmpeg_command(command_list):
+    if return_code != 0 or not stdout:
+        return None
+    try:
+        data = json.loads(stdout)
+    except ValueError as e:
+        logging.error(f"解析 ffprobe JSON 输出失败: {e}")
+        return None
+    streams = data.get('streams') or [{}]
+    info = dict(streams[0])
+    info['duration'] = data.get('format', {}).get('duration')
+    return info
+
+def _ffmpeg_threads(n_workers):
+    """按并发数均分 CPU 核心，使所有 ffmpeg 进程的线程总数约等于核心数。"""
+    return max(1, (os.cpu_count() or n_workers) // n_workers)
+
+def run_ffmpeg_command(command_list, input_text=None):
     """执行 ffmpeg 命令，返回 True 表示成功，False 表示失败。"""
-    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'warning', '-y'] + command_list
-    return_code, _, _ = run_command(cmd, "ffmpeg")
+    cmd = [FFMPEG_BIN, '-hide_banner', '-loglevel', 'warning', '-y'] + command_list
+    if FFMPEG_THREADS:
+        cmd[-1:-1] = ['-threads', str(FFMPEG_THREADS)]  # 输出选项，须位于输出文件之前
+    # ffmpeg 自身多线程，限制并发数避免在多核机器上过度争用 CPU 与内存
+    with FFMPEG_SEM:
+        return_code = run_silent(cmd, "ffmpeg", input_text)
     return return_code == 0
 
-def find_corresponding_video(audio_file_path):
-    """根据音频文件路径，在上一级目录查找对应的视频文件。"""
-    audio_filename = os.path.basename(audio_file_path)
-    audio_name_no_ext = os.path.splitext(audio_filename)[0]
+@functools.lru_cache(maxsize=256)
+def _list_videos(search_dir):
+    """列出目录中的视频文件 (不含扩展名的文件名, 完整路径)，同一目录只扫描一次。"""
+    entries = []
+    with os.scandir(search_dir) as it:
+        for entry in it:
+            video_name_no_ext, video_ext = os.path.splitext(entry.name)
+            if video_ext.lower() in VIDEO_EXTENSIONS and entry.is_file():
+                entries.append((video_name_no_ext, entry.path))
+    return tuple(entries)
+
+@functools.lru_cache(maxsize=256)
+def _video_automaton(search_dir):
+    """为目录中的视频文件名构建 Aho–Corasick 自动机，值为 (列表序号, 完整路径)。"""
+    automaton = ahocorasick.Automaton()
+    for index, (video_name_no_ext, entry_path) in enumerate(_list_videos(search_dir)):
+        if video_name_no_ext not in automaton:
+            automaton.add_word(video_name_no_ext, (index, entry_path))
+    automaton.make_automaton()
+    return automaton
+
+def _match_video(search_dir, audio_name_no_ext):
+    """返回目录中第一个文件名是音频文件名子串的视频路径。"""
+    videos = _list_videos(search_dir)
+    if not videos:
+        return None
+    if ahocorasick is not None:
+        # 一次扫描音频文件名即可找出所有命中的视频名，取目录顺序中最靠前者
+        matches = [value for _, value in _video_automaton(search_dir).iter(audio_name_no_ext)]
+        return min(matches)[1] if matches else None
+    for video_name_no_ext, entry_path in videos:
+        if video_name_no_ext in audio_name_no_ext:
+            return entry_path
+    return None
+
+def find_corresponding_video(audio):
+    """根据音频输入 (AudioInput)，在上一级目录查找对应的视频文件。"""
+    audio_filename, audio_name_no_ext = audio.basename, audio.stem
     
     # 假设视频在音频目录的上一级
-    search_dir = os.path.dirname(os.path.dirname(os.path.abspath(audio_file_path)))
+    search_dir = audio.search_dir
     
     logging.debug(f"正在目录 '{search_dir}' 中为音频 '{audio_filename}' 查找视频...")
 
-    # 遍历目录查找视频文件
-    for entry in os.listdir(search_dir):
-        entry_path = os.path.join(search_dir, entry)
-        if os.path.isfile(entry_path):
-            video_name_no_ext, video_ext = os.path.splitext(entry)
-            if video_ext.lower() in VIDEO_EXTENSIONS:
-                # 核心匹配逻辑：视频文件名（不含扩展名）是音频文件名（不含扩展名）的子串
-                if video_name_no_ext in audio_name_no_ext:
-                    logging.info(f"为音频 '{audio_filename}' 找到匹配的视频: '{entry}'")
-                    return entry_path
+    # 核心匹配逻辑：视频文件名（不含扩展名）是音频文件名（不含扩展名）的子串
+    entry_path = _match_video(search_dir, audio_name_no_ext)
+    if entry_path:
+        logging.info(f"为音频 '{audio_filename}' 找到匹配的视频: '{os.path.basename(entry_path)}'")
+        return entry_path
     
     logging.warning(f"在 '{search_dir}' 中未找到与音频 '{audio_filename}' 匹配的视频文件。")
     return None
 
-def process_audio_task(audio_file):
+def process_audio_task(audio, single_pass=False):
     """
     处理单个音频文件的任务 (替换视频中的音频)。
     输出时长为视频和音频中较长者。
+    single_pass 为 True 时黑场延长与合并在一次 ffmpeg 中完成（视频需重新编码）。
     返回 'success', 'skipped', or 'failed'。
     """
-    task_id = os.path.basename(audio_file)
+    task_id = audio.basename
     logging.info(f"--- [任务 {task_id}] 开始处理 (模式: 音频替换) ---")
     
-    abs_audio_file = os.path.abspath(audio_file)
-    video_file = find_corresponding_video(abs_audio_file)
+    abs_audio_file = audio.abs_path
+    video_file = find_corresponding_video(audio)
 
     if not video_file:
         logging.warning(f"[任务 {task_id}] 跳过 - 未找到对应的视频文件。")
@@ -126,9 +241,8 @@ def process_audio_task(audio_file):
     output_dir = os.path.abspath(OUTPUT_MIX_DIR)
     output_file = os.path.join(output_dir, video_task_id)
 
-    temp_black_video = None
-    temp_concat_video = None
-    list_file_path = None
+    temp_dir = None
+    merge_cmd = None
     status_to_return = 'failed'
 
     try:
@@ -137,8 +251,11 @@ def process_audio_task(audio_file):
 
         logging.info(f"[任务 {task_id}] 开始获取媒体信息...")
 
-        video_duration_str = run_ffprobe(abs_video_file, 'format=duration')
-        audio_duration_str = run_ffprobe(abs_audio_file, 'format=duration')
+        # 每个文件只调用一次 ffprobe，视频的宽/高/帧率随时长一并取回
+        video_info = probe_all(abs_video_file) or {}
+        audio_info = probe_all(abs_audio_file) or {}
+        video_duration_str = video_info.get('duration')
+        audio_duration_str = audio_info.get('duration')
 
         if video_duration_str is None or audio_duration_str is None:
             logging.error(f"[任务 {task_id}] 无法获取视频或音频的时长。标记为失败。")
@@ -159,9 +276,9 @@ def process_audio_task(audio_file):
             duration_diff = audio_duration - video_duration
             logging.info(f"[任务 {task_id}] 音频比视频长约 {duration_diff:.3f}秒，将生成黑场以延长视频至约 {audio_duration:.3f}秒。")
 
-            video_width_str = run_ffprobe(abs_video_file, 'stream=width', 'v', 0, 'csv=p=0')
-            video_height_str = run_ffprobe(abs_video_file, 'stream=height', 'v', 0, 'csv=p=0')
-            video_fps_str = run_ffprobe(abs_video_file, 'stream=r_frame_rate', 'v', 0)
+            video_width_str = video_info.get('width')
+            video_height_str = video_info.get('height')
+            video_fps_str = video_info.get('r_frame_rate')
 
             if not all([video_width_str, video_height_str, video_fps_str]):
                 logging.error(f"[任务 {task_id}] 获取视频属性（宽/高/帧率）失败，无法生成黑场。标记为失败。")
@@ -181,49 +298,64 @@ def process_audio_task(audio_file):
 
             logging.debug(f"[任务 {task_id}] 视频属性 - 分辨率: {video_width}x{video_height}, FPS: {video_fps:.3f}")
 
-            temp_black_video = os.path.join(output_dir, f"temp_black_{video_name_no_ext}_{int(time.time())}.mp4")
-            temp_concat_video = os.path.join(output_dir, f"temp_concat_{video_name_no_ext}_{int(time.time())}.mp4")
-            list_file_path = os.path.join(output_dir, f"temp_list_{video_name_no_ext}_{int(time.time())}.txt")
-
-            black_cmd = ['-f', 'lavfi', '-i', f'color=c=black:s={video_width}x{video_height}:d={duration_diff:.6f}',
-                         '-r', str(video_fps), '-pix_fmt', 'yuv420p', temp_black_video]
-            logging.info(f"[任务 {task_id}] 正在生成黑场片段...")
-            if not run_ffmpeg_command(black_cmd):
-                logging.error(f"[任务 {task_id}] 生成黑场失败。标记为失败。")
-                return status_to_return
-
-            try:
-                with open(list_file_path, 'w', encoding='utf-8') as f:
-                    f.write(f"file '{abs_video_file.replace('\\', '/')}'\n")
-                    f.write(f"file '{temp_black_video.replace('\\', '/')}'\n")
-                logging.debug(f"[任务 {task_id}] 已创建列表文件: {list_file_path}")
-            except IOError as e:
-                logging.error(f"[任务 {task_id}] 创建concat列表文件失败: {e}。标记为失败。")
-                return status_to_return
-
-            concat_cmd = ['-f', 'concat', '-safe', '0', '-i', list_file_path, '-c', 'copy', temp_concat_video]
-            logging.info(f"[任务 {task_id}] 正在拼接原视频和黑场...")
-            if not run_ffmpeg_command(concat_cmd):
-                logging.error(f"[任务 {task_id}] 视频拼接失败。标记为失败。")
-                return status_to_return
-
-            video_input_for_merge = temp_concat_video
-            logging.info(f"[任务 {task_id}] 视频已成功延长至约 {audio_duration:.3f}秒。")
+            if single_pass:
+                # 单次 ffmpeg：原视频与 lavfi 黑场经 concat 滤镜拼接后直接与新音频合并，不落地中间文件
+                sar = video_info.get('sample_aspect_ratio')
+                if not sar or sar in ('0:1', 'N/A'):
+                    sar = '1'
+                black_source = (f'color=c=black:s={video_width}x{video_height}:r={video_fps}'
+                                f':d={duration_diff:.6f},setsar={sar.replace(":", "/")}')
+                merge_cmd = ['-i', abs_video_file,
+                             '-f', 'lavfi', '-i', black_source,
+                             '-i', abs_audio_file,
+                             '-filter_complex', '[0:v][1:v]concat=n=2:v=1:a=0,format=yuv420p[v]',
+                             '-map', '[v]',
+                             '-map', '2:a:0',
+                             '-c:v', 'libx264',
+                             '-c:a', 'aac', '-b:a', '192k',
+                             output_file]
+                logging.info(f"[任务 {task_id}] 单次模式: 黑场拼接与音频合并将在同一个 ffmpeg 中完成 (视频重新编码)。")
+            else:
+                # 中间文件统一放在任务专属的系统临时目录 (Linux 上通常为 tmpfs)，结束时整体删除
+                temp_dir = tempfile.TemporaryDirectory(prefix=f"mix_{video_name_no_ext}_", ignore_cleanup_errors=True)
+                temp_black_video = os.path.join(temp_dir.name, "black.mp4")
+                temp_concat_video = os.path.join(temp_dir.name, "concat.mp4")
+
+                black_cmd = ['-f', 'lavfi', '-i', f'color=c=black:s={video_width}x{video_height}:d={duration_diff:.6f}',
+                             '-r', str(video_fps), '-pix_fmt', 'yuv420p', temp_black_video]
+                logging.info(f"[任务 {task_id}] 正在生成黑场片段...")
+                if not run_ffmpeg_command(black_cmd):
+                    logging.error(f"[任务 {task_id}] 生成黑场失败。标记为失败。")
+                    return status_to_return
+
+                # concat 列表经标准输入传给 ffmpeg，无需落地临时列表文件
+                list_content = "".join(f"file '{path}'\n" for path in
+                                       (abs_video_file.replace('\\', '/'), temp_black_video.replace('\\', '/')))
+                concat_cmd = ['-f', 'concat', '-safe', '0', '-protocol_whitelist', 'file,pipe',
+                              '-i', 'pipe:0', '-c', 'copy', temp_concat_video]
+                logging.info(f"[任务 {task_id}] 正在拼接原视频和黑场...")
+                if not run_ffmpeg_command(concat_cmd, list_content):
+                    logging.error(f"[任务 {task_id}] 视频拼接失败。标记为失败。")
+                    return status_to_return
+
+                video_input_for_merge = temp_concat_video
+                logging.info(f"[任务 {task_id}] 视频已成功延长至约 {audio_duration:.3f}秒。")
         else:
             logging.info(f"[任务 {task_id}] 音频时长不长于视频 ({audio_duration:.3f}秒 <= {video_duration:.3f}秒)。输出将以视频时长为准。")
 
         logging.info(f"[任务 {task_id}] 开始合并视频和新音频 (替换模式，时长取较长者)...")
-        merge_cmd = ['-i', video_input_for_merge,
-                     '-i', abs_audio_file,
-                     '-map', '0:v:0',
-                     '-map', '1:a:0',
-                     '-c:v', 'copy',
-                     '-c:a', 'aac', '-b:a', '192k',
-                     output_file]
+        if merge_cmd is None:
+            merge_cmd = ['-i', video_input_for_merge,
+                         '-i', abs_audio_file,
+                         '-map', '0:v:0',
+                         '-map', '1:a:0',
+                         '-c:v', 'copy',
+                         '-c:a', 'aac', '-b:a', '192k',
+                         output_file]
         
         if run_ffmpeg_command(merge_cmd):
-            final_duration_str = run_ffprobe(output_file, 'format=duration')
-            logging.info(f"[任务 {task_id}] ✅ 音频替换成功，已输出到: {output_file} (最终时长: {final_duration_str}秒)")
+            expected_duration = max(video_duration, audio_duration)
+            logging.info(f"[任务 {task_id}] ✅ 音频替换成功，已输出到: {output_file} (预计时长: {expected_duration:.3f}秒)")
             status_to_return = 'success'
         else:
             logging.error(f"[任务 {task_id}] ❌ 最终合并失败。标记为失败。")
@@ -236,21 +368,30 @@ def process_audio_task(audio_file):
         return 'failed'
 
     finally:
-        files_to_remove = [temp_black_video, temp_concat_video, list_file_path]
-        for f_path in files_to_remove:
-            if f_path and os.path.exists(f_path):
-                try:
-                    os.remove(f_path)
-                    logging.debug(f"[任务 {task_id}] 已删除临时文件: {f_path}")
-                except OSError as e:
-                    logging.warning(f"[任务 {task_id}] 删除临时文件失败: {f_path}, 错误: {e}")
+        if temp_dir is not None:
+            temp_dir.cleanup()
+            logging.debug(f"[任务 {task_id}] 已删除临时目录: {temp_dir.name}")
         logging.info(f"--- [任务 {task_id}] 处理结束 (最终状态: {status_to_return.upper()}) ---")
 
 def main():
     parser = argparse.ArgumentParser(description=f'{SCRIPT_NAME} v{SCRIPT_VERSION} - 通过命令行参数接收音频文件，并替换匹配视频的音轨。')
     parser.add_argument('files', nargs='*', help='一个或多个要处理的音频文件路径。')
+    parser.add_argument('--single-pass', action='store_true',
+                        help='音频较长时用一次 ffmpeg 完成黑场延长与合并，省去中间文件，但视频需重新编码。')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, metavar='N',
+                        help=f'并发处理的任务数 (默认: {MAX_WORKERS})。')
+    parser.add_argument('--ffmpeg-threads', type=int, default=None, metavar='N',
+                        help='每个 ffmpeg 进程使用的线程数 (默认: CPU 核心数 / 并发数)。')
+    parser.add_argument('--ffmpeg-parallel', type=int, default=None, metavar='N',
+                        help='同时运行的 ffmpeg 进程数上限 (默认: 与 --workers 相同)。')
     args = parser.parse_args()
 
+    global FFMPEG_SEM, FFMPEG_THREADS
+    workers = max(1, args.workers)
+    ffmpeg_parallel = max(1, args.ffmpeg_parallel or workers)
+    FFMPEG_SEM = threading.Semaphore(ffmpeg_parallel)
+    FFMPEG_THREADS = args.ffmpeg_threads or _ffmpeg_threads(min(workers, ffmpeg_parallel))
+
     start_time = time.time()
     current_working_dir = Path.cwd().resolve()
     logging.info("="*20 + f" {SCRIPT_NAME} v{SCRIPT_VERSION} 开始执行 " + "="*20)
@@ -277,14 +418,14 @@ def main():
 
     completed_tasks, skipped_tasks, failed_tasks = 0, 0, 0
 
-    logging.info(f"开始使用最多 {MAX_WORKERS} 个线程进行处理...")
+    logging.info(f"开始使用最多 {workers} 个线程进行处理 (ffmpeg 并发上限: {ffmpeg_parallel}, 每个 {FFMPEG_THREADS} 线程)...")
     try:
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            future_to_audio = {executor.submit(process_audio_task, f): f for f in audio_files}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            audio_inputs = [AudioInput.from_path(f) for f in audio_files]
+            future_to_audio = {executor.submit(process_audio_task, audio, args.single_pass): audio for audio in audio_inputs}
 
             for future in as_completed(future_to_audio):
-                audio_file = future_to_audio[future]
-                task_id = os.path.basename(audio_file)
+                task_id = future_to_audio[future].basename
                 try:
                     status = future.result()
                     if status == 'success': completed_tasks += 1
@@ -321,8 +462,8 @@ def main():
 if __name__ == "__main__":
     try:
         logging.info("正在检查依赖 (ffmpeg, ffprobe)...")
-        ffmpeg_code, _, _ = run_command(['ffmpeg', '-version'], 'ffmpeg check')
-        ffprobe_code, _, _ = run_command(['ffprobe', '-version'], 'ffprobe check')
+        ffmpeg_code, _, _ = run_command([FFMPEG_BIN, '-version'], 'ffmpeg check')
+        ffprobe_code, _, _ = run_command([FFPROBE_BIN, '-version'], 'ffprobe check')
         if ffmpeg_code is None or ffprobe_code is None or ffmpeg_code != 0 or ffprobe_code != 0:
              logging.critical("错误: ffmpeg 或 ffprobe 命令无效或执行失败。请确保它们已正确安装并位于系统PATH中。脚本无法继续。")
              sys.exit(1)
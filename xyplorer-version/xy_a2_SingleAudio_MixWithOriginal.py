@@ -1,21 +1,34 @@
 # -*- coding: utf-8 -*-
 import os
 import sys
+import json
+import functools
 import subprocess
+import shutil
+import tempfile
+import threading
 import logging
+import math
 import time
 import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from pathlib import Path
 import argparse
 
 # --- 配置区 ---
 SCRIPT_NAME = "xy_SingleAudio_MixWithOriginal"
 SCRIPT_VERSION = "1.0.0"
-MAX_WORKERS = os.cpu_count() or 4
+MAX_WORKERS = max(1, (os.cpu_count() or 4) // 2)  # ffmpeg 自身多线程，任务并发取核心数的一半
+FFMPEG_THREADS = None  # 每个 ffmpeg 进程的线程数，由 main() 按并发数设置
+VERIFY_OUTPUT = False  # 由 main() 根据 --verify-output 设置，成功后再探测一次输出时长
 OUTPUT_MIX_DIR = "~mix"   # Folder name in current directory
 DEFAULT_ENCODING = 'utf-8'
-VIDEO_EXTENSIONS = ['.mp4', '.mov', '.mkv', '.avi', '.flv'] # Supported video formats
+# 启动时解析一次 ffmpeg/ffprobe 的绝对路径，避免每次启动子进程都搜索 PATH (Windows 下还要遍历 PATHEXT)
+FFMPEG_BIN = shutil.which('ffmpeg') or 'ffmpeg'
+FFPROBE_BIN = shutil.which('ffprobe') or 'ffprobe'
+VIDEO_EXTENSIONS = frozenset(('.mp4', '.mov', '.mkv', '.avi', '.flv')) # Supported video formats
+PROBE_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'xy_toolkit', 'probe.json')  # 跨运行共享的 ffprobe 结果
 
 # --- 日志配置 ---
 root_logger = logging.getLogger()
@@ -34,25 +47,40 @@ if not root_logger.hasHandlers():
 
 # --- 核心函数 ---
 
+@dataclass(slots=True, frozen=True)
+class AudioInput:
+    """在 main() 中一次性解析好的音频输入路径，任务内直接读取属性而不再反复拆分路径。"""
+    abs_path: str
+    basename: str
+    stem: str
+    search_dir: str  # 视频所在目录，即音频目录的上一级
+
+    @classmethod
+    def from_path(cls, path):
+        abs_path = os.path.abspath(path)
+        basename = os.path.basename(abs_path)
+        return cls(abs_path, basename, os.path.splitext(basename)[0], os.path.dirname(os.path.dirname(abs_path)))
+
 def run_command(cmd, command_name="外部命令"):
-    """执行外部命令并捕获其输出的通用函数。"""
+    """执行外部命令并捕获其输出的通用函数。
+    标准输出/错误以原始字节返回 (ffprobe 的 JSON 可直接交给 json.loads)，仅在记录日志时解码。"""
     logging.debug(f"正在执行 {command_name} 命令: {' '.join(cmd)}")
     try:
         creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
         process = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-            encoding=DEFAULT_ENCODING, errors='replace', creationflags=creationflags
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=creationflags
         )
         stdout, stderr = process.communicate()
         return_code = process.poll()
 
-        if stdout: logging.debug(f"{command_name} 标准输出:\n{stdout.strip()}")
-        if stderr: logging.debug(f"{command_name} 标准错误输出:\n{stderr.strip()}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            if stdout: logging.debug(f"{command_name} 标准输出:\n{stdout.decode(DEFAULT_ENCODING, errors='replace').strip()}")
+            if stderr: logging.debug(f"{command_name} 标准错误输出:\n{stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
 
         if return_code != 0:
             logging.error(f"{command_name} 命令执行失败，返回码: {return_code}")
             if stderr and not stdout:
-                logging.error(f"错误详情 (标准错误输出): {stderr.strip()}")
+                logging.error(f"错误详情 (标准错误输出): {stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
             elif stderr:
                  logging.error(f"(更详细的错误信息可能在DEBUG日志中)")
         else:
@@ -66,47 +94,215 @@ def run_command(cmd, command_name="外部命令"):
         logging.error(traceback.format_exc())
         return None, None, None
 
-def run_ffprobe(input_file, show_entries, stream_type='v', stream_index=0, format_option='default=noprint_wrappers=1:nokey=1'):
-    """使用 ffprobe 获取媒体文件信息。"""
-    cmd = ['ffprobe', '-v', 'error', '-select_streams', f'{stream_type}:{stream_index}',
-           '-show_entries', show_entries, '-of', format_option, input_file]
+def run_silent(cmd, command_name="外部命令", input_text=None):
+    """执行不需要标准输出的外部命令 (如 ffmpeg)，返回返回码，启动失败时返回 None。
+    标准输出直接丢弃，标准错误以字节读取，仅在失败或 DEBUG 日志开启时解码。"""
+    logging.debug(f"正在执行 {command_name} 命令: {' '.join(cmd)}")
+    debug = logging.getLogger().isEnabledFor(logging.DEBUG)
+    stdin_kwargs = {'input': input_text.encode(DEFAULT_ENCODING)} if input_text is not None else {'stdin': subprocess.DEVNULL}
+    try:
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        result = subprocess.run(
+            cmd, stdout=subprocess.PIPE if debug else subprocess.DEVNULL, stderr=subprocess.PIPE,
+            creationflags=creationflags, **stdin_kwargs
+        )
+    except FileNotFoundError:
+        logging.error(f"{command_name} 命令 '{cmd[0]}' 未找到。请确保 FFmpeg/FFprobe 已安装并配置在系统PATH中。")
+        return None
+    except Exception as e:
+        logging.error(f"执行 {command_name} 时发生未知异常: {e}")
+        logging.error(traceback.format_exc())
+        return None
+
+    if result.returncode != 0:
+        logging.error(f"{command_name} 命令执行失败，返回码: {result.returncode}")
+        if result.stderr:
+            logging.error(f"错误详情 (标准错误输出): {result.stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
+    elif debug:
+        if result.stdout: logging.debug(f"{command_name} 标准输出:\n{result.stdout.decode(DEFAULT_ENCODING, errors='replace').strip()}")
+        if result.stderr: logging.debug(f"{command_name} 标准错误输出:\n{result.stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
+        logging.debug(f"{command_name} 命令执行成功。")
+    return result.returncode
+
+_PROBE_STREAM_KEYS = ('codec_type', 'codec_name', 'width', 'height', 'r_frame_rate')
+
+def _load_probe_cache():
+    """读取磁盘上的 ffprobe 缓存 {绝对路径: {'mtime_ns', 'size', 'info'}}，文件缺失或损坏时返回空字典。"""
+    try:
+        with open(PROBE_CACHE_FILE, 'rb') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+_PROBE_DISK_CACHE = _load_probe_cache()
+_PROBE_DISK_UPDATES = {}  # 本次运行新探测的条目，保存时合并进磁盘上的最新内容
+_PROBE_DISK_LOCK = threading.Lock()
+
+def save_probe_cache():
+    """有新的探测结果时保存缓存，由 main() 在结束前显式调用。
+    先重新读取磁盘文件并合并本次结果 (同时运行的其他实例写入的条目得以保留)，
+    丢弃对应文件已不存在的条目，再写入临时文件后以 os.replace 原子替换。"""
+    with _PROBE_DISK_LOCK:
+        updates = dict(_PROBE_DISK_UPDATES)
+    if not updates:
+        return
+    merged = _load_probe_cache()
+    merged.update(updates)
+    merged = {path: entry for path, entry in merged.items() if os.path.exists(path)}
+    tmp_path = f"{PROBE_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        payload = json.dumps(merged, ensure_ascii=False)
+        os.makedirs(os.path.dirname(PROBE_CACHE_FILE), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp_path, PROBE_CACHE_FILE)
+    except OSError as e:
+        logging.warning(f"保存 ffprobe 缓存失败: {e}")
+
+def probe_media(input_file):
+    """获取媒体文件的 ffprobe 信息 (streams + format)，按 (路径, 修改时间, 大小) 缓存，失败时返回 None。
+    结果同时写入磁盘缓存，后续运行中未改动的文件无需再次调用 ffprobe。"""
+    input_file = os.path.abspath(input_file)
+    try:
+        st = os.stat(input_file)
+    except OSError as e:
+        logging.error(f"无法读取文件信息: {input_file}, 错误: {e}")
+        return None
+    return _probe_cached(input_file, st.st_mtime_ns, st.st_size)
+
+@functools.lru_cache(maxsize=4096)
+def _probe_cached(input_file, mtime_ns, size):
+    # mtime_ns/size 同时用作内存与磁盘缓存的校验，文件被改写后自动重新探测
+    entry = _PROBE_DISK_CACHE.get(input_file)
+    if entry and entry.get('mtime_ns') == mtime_ns and entry.get('size') == size:
+        return entry.get('info')
+    cmd = [FFPROBE_BIN, '-v', 'error', '-show_streams', '-show_format', '-of', 'json', input_file]
     return_code, stdout, stderr = run_command(cmd, "ffprobe")
-    return stdout.strip() if return_code == 0 and stdout is not None else None
-
-def run_ffmpeg_command(command_list):
-    """执行 ffmpeg 命令，返回 True 表示成功，False 表示失败。"""
-    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'warning', '-y'] + command_list
-    return_code, _, _ = run_command(cmd, "ffmpeg")
+    if return_code != 0 or not stdout:
+        return None
+    try:
+        data = json.loads(stdout)
+    except ValueError as e:
+        logging.error(f"解析 ffprobe JSON 输出失败: {e}")
+        return None
+    # 只保留用到的字段，避免缓存文件被标签等元数据撑大
+    info = {'streams': [{k: st[k] for k in _PROBE_STREAM_KEYS if k in st} for st in data.get('streams', [])],
+            'format': {'duration': data.get('format', {}).get('duration')}}
+    with _PROBE_DISK_LOCK:
+        _PROBE_DISK_CACHE[input_file] = _PROBE_DISK_UPDATES[input_file] = {'mtime_ns': mtime_ns, 'size': size, 'info': info}
+    return info
+
+def _first_stream(info, codec_type):
+    """返回探测结果中首个指定类型 ('video'/'audio') 的流，不存在时返回 None。"""
+    return next((st for st in (info or {}).get('streams', []) if st.get('codec_type') == codec_type), None)
+
+def _format_duration(info):
+    return (info or {}).get('format', {}).get('duration')
+
+def _replace_audio_codec_args(audio_info):
+    """直接替换音轨时的音频编码参数：新音频已是 AAC 则流复制，否则编码为 AAC。
+    amix 混音必须先解码，只有替换分支能走这条快速路径。"""
+    audio_stream = _first_stream(audio_info, 'audio') or {}
+    return ['-c:a', 'copy'] if audio_stream.get('codec_name') == 'aac' else ['-c:a', 'aac', '-b:a', '192k']
+
+def _ffmpeg_threads(n_workers):
+    """按并发数均分 CPU 核心，使所有 ffmpeg 进程的线程总数约等于核心数。"""
+    return max(1, (os.cpu_count() or n_workers) // n_workers)
+
+def run_ffmpeg_command(command_list, input_text=None):
+    """执行 ffmpeg 命令，input_text 非空时写入标准输入，返回 True 表示成功，False 表示失败。"""
+    cmd = [FFMPEG_BIN, '-hide_banner', '-loglevel', 'warning', '-y'] + command_list
+    if FFMPEG_THREADS:
+        cmd[-1:-1] = ['-threads', str(FFMPEG_THREADS)]  # 输出选项，须位于输出文件之前
+    return_code = run_silent(cmd, "ffmpeg", input_text)
     return return_code == 0
 
-def find_corresponding_video(audio_file_path):
-    """根据音频文件路径，在上一级目录查找对应的视频文件。"""
-    audio_filename = os.path.basename(audio_file_path)
-    audio_name_no_ext = os.path.splitext(audio_filename)[0]
-    search_dir = os.path.dirname(os.path.dirname(os.path.abspath(audio_file_path)))
+@functools.lru_cache(maxsize=256)
+def _list_videos(search_dir):
+    """列出目录中的视频文件 (不含扩展名的文件名, 完整路径)，同一目录只扫描一次。"""
+    entries = []
+    with os.scandir(search_dir) as it:
+        for entry in it:
+            video_name_no_ext, video_ext = os.path.splitext(entry.name)
+            if video_ext.lower() in VIDEO_EXTENSIONS and entry.is_file():
+                entries.append((video_name_no_ext, entry.path))
+    return tuple(entries)
+
+_BLACK_CLIP_DIR = None  # 本次运行共享的黑场片段目录，首次需要时创建
+_BLACK_CLIPS = {}  # (宽, 高, 帧率, 时长档位) -> 黑场片段路径
+_BLACK_CLIP_LOCKS = {}
+_BLACK_CLIP_LOCK = threading.Lock()
+_BLACK_CLIP_MAX_BUCKET = 8  # 超过该秒数的黑场不再按 2 的幂取整
+
+def get_black_clip(width, height, fps, min_duration):
+    """返回时长不短于 min_duration 的共享黑场片段路径，生成失败时返回 None。
+    片段按 (宽, 高, 帧率, 时长档位) 在同一次运行中只编码一次，且全部为 I 帧 (-g 1)，
+    可在 concat 列表中用 outpoint 按任意时长截取，无需为每个任务单独生成黑场。
+    档位在 _BLACK_CLIP_MAX_BUCKET 秒以内按 2 的幂取整，超过后按整秒向上取整，避免长片段多编码近一倍。"""
+    global _BLACK_CLIP_DIR
+    bucket = 1
+    while bucket < min_duration and bucket < _BLACK_CLIP_MAX_BUCKET: bucket *= 2
+    if bucket < min_duration: bucket = math.ceil(min_duration)
+    key = (width, height, str(fps), bucket)
+    with _BLACK_CLIP_LOCK:
+        if key in _BLACK_CLIPS: return _BLACK_CLIPS[key]
+        if _BLACK_CLIP_DIR is None:
+            _BLACK_CLIP_DIR = tempfile.TemporaryDirectory(prefix="black_clips_", ignore_cleanup_errors=True)
+        key_lock = _BLACK_CLIP_LOCKS.setdefault(key, threading.Lock())
+    with key_lock: # 同规格的其他任务等待这一次编码完成
+        if key not in _BLACK_CLIPS:
+            clip_path = os.path.join(_BLACK_CLIP_DIR.name, f"black_{width}x{height}_{fps}_{bucket}s.mp4")
+            black_cmd = ['-f', 'lavfi', '-i', f'color=c=black:s={width}x{height}:d={bucket}', '-r', str(fps),
+                         '-g', '1', '-pix_fmt', 'yuv420p', clip_path]
+            if not run_ffmpeg_command(black_cmd):
+                # 失败结果不写入缓存，后续任务会重新尝试生成
+                logging.error(f"生成黑场片段失败: {width}x{height} @ {fps}fps, {bucket}秒")
+                return None
+            _BLACK_CLIPS[key] = clip_path
+        return _BLACK_CLIPS[key]
+
+def cleanup_black_clips():
+    """删除本次运行生成的共享黑场片段。"""
+    if _BLACK_CLIP_DIR is not None:
+        _BLACK_CLIP_DIR.cleanup()
+
+def find_corresponding_video(audio):
+    """根据音频输入 (AudioInput)，在上一级目录查找对应的视频文件。"""
+    audio_filename, audio_name_no_ext, search_dir = audio.basename, audio.stem, audio.search_dir
     
     logging.debug(f"正在目录 '{search_dir}' 中为音频 '{audio_filename}' 查找视频...")
-    for entry in os.listdir(search_dir):
-        entry_path = os.path.join(search_dir, entry)
-        if os.path.isfile(entry_path):
-            video_name_no_ext, video_ext = os.path.splitext(entry)
-            if video_ext.lower() in VIDEO_EXTENSIONS and video_name_no_ext in audio_name_no_ext:
-                logging.info(f"为音频 '{audio_filename}' 找到匹配的视频: '{entry}'")
-                return entry_path
+    for video_name_no_ext, entry_path in _list_videos(search_dir):
+        if video_name_no_ext in audio_name_no_ext:
+            logging.info(f"为音频 '{audio_filename}' 找到匹配的视频: '{os.path.basename(entry_path)}'")
+            return entry_path
     logging.warning(f"在 '{search_dir}' 中未找到与音频 '{audio_filename}' 匹配的视频文件。")
     return None
 
-def process_audio_task(audio_file):
+def _run_final_mix(task_id, final_mix_cmd, output_file):
+    """执行最终混合命令并记录结果，返回 'success' 或 'failed'。"""
+    logging.info(f"[任务 {task_id}] 开始混合音频...")
+    if run_ffmpeg_command(final_mix_cmd):
+        verify = VERIFY_OUTPUT and logging.getLogger().isEnabledFor(logging.INFO)
+        final_duration_str = _format_duration(probe_media(output_file)) if verify else '—'
+        logging.info(f"[任务 {task_id}] ✅ 音频混合成功，已输出到: {output_file} (最终时长: {final_duration_str}秒)")
+        return 'success'
+    logging.error(f"[任务 {task_id}] ❌ 最终混合失败。")
+    return 'failed'
+
+def process_audio_task(audio, fast_pad=False):
     """
     处理单个音频文件的任务 (与原视频音频混合)。
     输出时长为视频和新音频中较长者。
+    默认用 tpad + amix 在一次 ffmpeg 中完成黑场延长与混音（视频需重新编码）；
+    fast_pad 为 True 时改用黑场片段 + concat 流复制，避免重新编码。
     返回 'success', 'skipped', or 'failed'。
     """
-    task_id = os.path.basename(audio_file)
+    task_id = audio.basename
     logging.info(f"--- [任务 {task_id}] 开始处理 (模式: 音频混合) ---")
     
-    abs_audio_file = os.path.abspath(audio_file)
-    video_file = find_corresponding_video(abs_audio_file)
+    abs_audio_file = audio.abs_path
+    video_file = find_corresponding_video(audio)
 
     if not video_file:
         logging.warning(f"[任务 {task_id}] 跳过 - 未找到对应的视频文件。")
@@ -119,14 +315,16 @@ def process_audio_task(audio_file):
     output_dir = os.path.abspath(OUTPUT_MIX_DIR)
     output_file = os.path.join(output_dir, video_task_id)
 
-    temp_black_video, temp_concat_video, list_file_path = None, None, None
+    temp_dir = None
     status_to_return = 'failed'
 
     try:
         logging.info(f"[任务 {task_id}] 开始获取媒体信息...")
-        video_duration_str = run_ffprobe(abs_video_file, 'format=duration')
-        new_audio_duration_str = run_ffprobe(abs_audio_file, 'format=duration')
-        original_audio_exists = run_ffprobe(abs_video_file, 'format=duration', stream_type='a') is not None
+        video_info = probe_media(abs_video_file)
+        video_duration_str = _format_duration(video_info)
+        audio_info = probe_media(abs_audio_file)
+        new_audio_duration_str = _format_duration(audio_info)
+        original_audio_exists = _first_stream(video_info, 'audio') is not None
 
         if not original_audio_exists:
             logging.warning(f"[任务 {task_id}] 原始视频不含音轨，将执行替换操作而非混合。")
@@ -146,28 +344,48 @@ def process_audio_task(audio_file):
             duration_diff = new_audio_duration - video_duration
             logging.info(f"[任务 {task_id}] 新音频比视频长约 {duration_diff:.3f}秒，将生成黑场以延长视频。")
 
-            video_width_str, video_height_str, video_fps_str = (run_ffprobe(abs_video_file, 'stream=width', 'v', 0, 'csv=p=0'),
-                                                               run_ffprobe(abs_video_file, 'stream=height', 'v', 0, 'csv=p=0'),
-                                                               run_ffprobe(abs_video_file, 'stream=r_frame_rate', 'v', 0))
+            if not fast_pad:
+                # tpad 在滤镜图内补黑帧，中间帧不落盘，一次 ffmpeg 完成延长与混音
+                pad_filter = f'[0:v]tpad=stop_mode=add:color=black:stop_duration={duration_diff:.6f}[vout]'
+                if original_audio_exists:
+                    filter_complex = pad_filter + ';[0:a][1:a]amix=inputs=2:duration=longest[aout]'
+                    audio_map, audio_codec = '[aout]', ['-c:a', 'aac', '-b:a', '192k']
+                else: # No original audio, so just replace
+                    filter_complex = pad_filter
+                    audio_map, audio_codec = '1:a:0', _replace_audio_codec_args(audio_info)
+                final_mix_cmd = ['-i', abs_video_file, '-i', abs_audio_file, '-filter_complex', filter_complex,
+                                 '-map', '[vout]', '-map', audio_map, '-c:v', 'libx264', '-preset', 'veryfast',
+                                 '-pix_fmt', 'yuv420p', *audio_codec, output_file]
+                status_to_return = _run_final_mix(task_id, final_mix_cmd, output_file)
+                return status_to_return
+
+            video_stream = _first_stream(video_info, 'video') or {}
+            video_width_str, video_height_str, video_fps_str = (video_stream.get('width'), video_stream.get('height'),
+                                                               video_stream.get('r_frame_rate'))
 
             if not all([video_width_str, video_height_str, video_fps_str]):
                 logging.error(f"[任务 {task_id}] 获取视频属性失败。标记为失败。")
                 return status_to_return
 
             video_width, video_height = int(video_width_str), int(video_height_str)
-            if '/' in video_fps_str: num, den = map(float, video_fps_str.split('/')); video_fps = num / den if den != 0 else 30
-            else: video_fps = float(video_fps_str)
+            # 部分封装的 r_frame_rate 为 0/0 或 0/1，分子或分母为 0 时按 30fps 处理
+            if '/' in video_fps_str:
+                num, den = map(float, video_fps_str.split('/'))
+                video_fps = num / den if num and den else 30
+            else: video_fps = float(video_fps_str) or 30
 
-            temp_black_video = os.path.join(output_dir, f"temp_black_{video_name_no_ext}_{int(time.time())}.mp4")
-            temp_concat_video = os.path.join(output_dir, f"temp_concat_{video_name_no_ext}_{int(time.time())}.mp4")
-            list_file_path = os.path.join(output_dir, f"temp_list_{video_name_no_ext}_{int(time.time())}.txt")
+            # 中间文件放在任务专属的系统临时目录 (Linux 上通常为 tmpfs)，结束时整体删除
+            temp_dir = tempfile.TemporaryDirectory(prefix=f"mix_{video_name_no_ext}_", ignore_cleanup_errors=True)
+            temp_concat_video = os.path.join(temp_dir.name, "concat.mp4")
 
-            black_cmd = ['-f', 'lavfi', '-i', f'color=c=black:s={video_width}x{video_height}:d={duration_diff:.6f}', '-r', str(video_fps), '-pix_fmt', 'yuv420p', temp_black_video]
-            if not run_ffmpeg_command(black_cmd): return status_to_return
+            black_clip = get_black_clip(video_width, video_height, video_fps, duration_diff)
+            if not black_clip: return status_to_return
 
-            with open(list_file_path, 'w', encoding='utf-8') as f: f.write(f"file '{abs_video_file.replace('\\', '/')}'\nfile '{temp_black_video.replace('\\', '/')}'\n")
-            concat_cmd = ['-f', 'concat', '-safe', '0', '-i', list_file_path, '-c', 'copy', temp_concat_video]
-            if not run_ffmpeg_command(concat_cmd): return status_to_return
+            # concat 列表经标准输入传给 ffmpeg，不落盘；outpoint 从共享黑场片段中只截取所需时长
+            video_entry, black_entry = abs_video_file.replace('\\', '/'), black_clip.replace('\\', '/')
+            concat_list = f"file '{video_entry}'\nfile '{black_entry}'\noutpoint {duration_diff:.6f}\n"
+            concat_cmd = ['-f', 'concat', '-safe', '0', '-protocol_whitelist', 'file,pipe', '-i', 'pipe:0', '-c', 'copy', temp_concat_video]
+            if not run_ffmpeg_command(concat_cmd, concat_list): return status_to_return
 
             video_input_for_mix = temp_concat_video
             logging.info(f"[任务 {task_id}] 视频已成功延长。")
@@ -177,7 +395,7 @@ def process_audio_task(audio_file):
                                  '-filter_complex', '[2:a][1:a]amix=inputs=2:duration=longest[a_mix]',
                                  '-map', '0:v:0', '-map', '[a_mix]', '-c:v', 'copy', '-c:a', 'aac', '-b:a', '192k', output_file]
             else: # No original audio, so just replace
-                final_mix_cmd = ['-i', video_input_for_mix, '-i', abs_audio_file, '-map', '0:v:0', '-map', '1:a:0', '-c:v', 'copy', '-c:a', 'aac', '-b:a', '192k', output_file]
+                final_mix_cmd = ['-i', video_input_for_mix, '-i', abs_audio_file, '-map', '0:v:0', '-map', '1:a:0', '-c:v', 'copy', *_replace_audio_codec_args(audio_info), output_file]
         else:
             logging.info(f"[任务 {task_id}] 新音频时长不长于视频。 ")
             if original_audio_exists:
@@ -185,16 +403,9 @@ def process_audio_task(audio_file):
                                  '-filter_complex', '[0:a][1:a]amix=inputs=2:duration=longest[a_mix]',
                                  '-map', '0:v:0', '-map', '[a_mix]', '-c:v', 'copy', '-c:a', 'aac', '-b:a', '192k', output_file]
             else: # No original audio, so just replace
-                final_mix_cmd = ['-i', video_input_for_mix, '-i', abs_audio_file, '-map', '0:v:0', '-map', '1:a:0', '-c:v', 'copy', '-c:a', 'aac', '-b:a', '192k', output_file]
-
-        logging.info(f"[任务 {task_id}] 开始混合音频...")
-        if run_ffmpeg_command(final_mix_cmd):
-            final_duration_str = run_ffprobe(output_file, 'format=duration')
-            logging.info(f"[任务 {task_id}] ✅ 音频混合成功，已输出到: {output_file} (最终时长: {final_duration_str}秒)")
-            status_to_return = 'success'
-        else:
-            logging.error(f"[任务 {task_id}] ❌ 最终混合失败。")
+                final_mix_cmd = ['-i', video_input_for_mix, '-i', abs_audio_file, '-map', '0:v:0', '-map', '1:a:0', '-c:v', 'copy', *_replace_audio_codec_args(audio_info), output_file]
 
+        status_to_return = _run_final_mix(task_id, final_mix_cmd, output_file)
         return status_to_return
 
     except Exception as e:
@@ -203,17 +414,29 @@ def process_audio_task(audio_file):
         return 'failed'
 
     finally:
-        for f_path in [temp_black_video, temp_concat_video, list_file_path]:
-            if f_path and os.path.exists(f_path):
-                try: os.remove(f_path); logging.debug(f"[任务 {task_id}] 已删除临时文件: {f_path}")
-                except OSError as e: logging.warning(f"[任务 {task_id}] 删除临时文件失败: {f_path}, 错误: {e}")
+        if temp_dir is not None:
+            temp_dir.cleanup()
+            logging.debug(f"[任务 {task_id}] 已删除临时目录: {temp_dir.name}")
         logging.info(f"--- [任务 {task_id}] 处理结束 (最终状态: {status_to_return.upper()}) ---")
 
 def main():
     parser = argparse.ArgumentParser(description=f'{SCRIPT_NAME} v{SCRIPT_VERSION} - 接收音频文件，并将其与匹配视频的原始音轨混合。')
     parser.add_argument('files', nargs='*', help='一个或多个要处理的音频文件路径。')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, metavar='N',
+                        help=f'并发处理的任务数 (默认: {MAX_WORKERS})。')
+    parser.add_argument('--ffmpeg-threads', type=int, default=None, metavar='N',
+                        help='每个 ffmpeg 进程使用的线程数 (默认: CPU 核心数 / 并发数)。')
+    parser.add_argument('--verify-output', action='store_true',
+                        help='混合成功后再用 ffprobe 读取输出文件时长并记录到日志。')
+    parser.add_argument('--fast-pad', action='store_true',
+                        help='延长视频时使用黑场片段 + concat 流复制，不重新编码 (默认: tpad 单次处理)。')
     args = parser.parse_args()
 
+    global FFMPEG_THREADS, VERIFY_OUTPUT
+    workers = max(1, args.workers)
+    VERIFY_OUTPUT = args.verify_output
+    FFMPEG_THREADS = args.ffmpeg_threads or _ffmpeg_threads(workers)
+
     start_time = time.time()
     logging.info("="*20 + f" {SCRIPT_NAME} v{SCRIPT_VERSION} 开始执行 " + "="*20)
     logging.info("模式: 音频混合。输出时长将是视频和新音频中较长的一个。 ")
@@ -230,9 +453,10 @@ def main():
 
     completed_tasks, skipped_tasks, failed_tasks = 0, 0, 0
 
-    logging.info(f"开始使用最多 {MAX_WORKERS} 个线程进行处理...")
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_audio = {executor.submit(process_audio_task, f): f for f in audio_files}
+    logging.info(f"开始使用最多 {workers} 个线程进行处理 (每个 ffmpeg {FFMPEG_THREADS} 线程)...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        audio_inputs = [AudioInput.from_path(f) for f in audio_files]
+        future_to_audio = {executor.submit(process_audio_task, audio, args.fast_pad): audio for audio in audio_inputs}
         for future in as_completed(future_to_audio):
             try:
                 status = future.result()
@@ -246,5 +470,39 @@ def main():
             processed_count = completed_tasks + skipped_tasks + failed_tasks
             logging.info(f"进度: {processed_count}/{total_tasks} | ✅成功: {completed_tasks} | ⏩跳过: {skipped_tasks} | ❌失败: {failed_tasks}")
 
+    cleanup_black_clips()
+    save_probe_cache()
     duration = time.time() - start_time
-    logging.info("-
\ No newline at end of file
+    logging.info("-" * 60)
+    logging.info("所有任务尝试处理完毕。")
+    logging.info(f"总计处理的音频文件数: {total_tasks}")
+    logging.info(f"✅ 成功: {completed_tasks}")
+    logging.info(f"⏩ 跳过 (未找到视频): {skipped_tasks}")
+    logging.info(f"❌ 失败: {failed_tasks}")
+    logging.info(f"总耗时: {duration:.2f} 秒 ({time.strftime('%H:%M:%S', time.gmtime(duration))})")
+
+    if failed_tasks > 0: logging.warning("存在处理失败的任务，请检查以上日志获取详情。")
+    if skipped_tasks > 0: logging.warning("存在被跳过的任务 (因为没有找到对应的视频文件)。")
+    
+    logging.info("="*20 + f" {SCRIPT_NAME} v{SCRIPT_VERSION} 执行完毕 " + "="*20)
+
+if __name__ == "__main__":
+    try:
+        logging.info("正在检查依赖 (ffmpeg, ffprobe)...")
+        ffmpeg_code, _, _ = run_command([FFMPEG_BIN, '-version'], 'ffmpeg check')
+        ffprobe_code, _, _ = run_command([FFPROBE_BIN, '-version'], 'ffprobe check')
+        if ffmpeg_code is None or ffprobe_code is None or ffmpeg_code != 0 or ffprobe_code != 0:
+             logging.critical("错误: ffmpeg 或 ffprobe 命令无效或执行失败。请确保它们已正确安装并位于系统PATH中。脚本无法继续。")
+             sys.exit(1)
+        else:
+             logging.info("依赖检查成功: ffmpeg 和 ffprobe 可用。")
+        
+        main()
+
+    except SystemExit:
+        pass
+    except Exception as e:
+        logging.critical(f"脚本顶层发生未捕获的异常: {e}")
+        logging.critical(traceback.format_exc())
+    finally:
+        logging.shutdown()
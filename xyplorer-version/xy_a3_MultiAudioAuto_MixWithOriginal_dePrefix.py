@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 import os
 import sys
+import json
+import functools
 import subprocess
+import shutil
+import tempfile
+import threading
 import logging
+import math
 import time
 import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -12,23 +18,28 @@ from pathlib import Path
 # --- 配置区 ---
 SCRIPT_NAME = "xy_MultiAudioAuto_MixWithOriginal_dePrefix"
 SCRIPT_VERSION = "1.0.0"
-MAX_WORKERS = os.cpu_count() or 4
+MAX_WORKERS = max(1, (os.cpu_count() or 4) // 2)  # ffmpeg 自身多线程，任务并发取核心数的一半
+FFMPEG_THREADS = None  # 每个 ffmpeg 进程的线程数，由 main() 按并发数设置
 OUTPUT_MIX_DIR = "~mix"
 DEFAULT_ENCODING = 'utf-8'
-VIDEO_EXTENSIONS = ['.mp4', '.mov', '.mkv', '.avi', '.flv']
+# 启动时解析一次 ffmpeg/ffprobe 的绝对路径，避免每次启动子进程都搜索 PATH (Windows 下还要遍历 PATHEXT)
+FFMPEG_BIN = shutil.which('ffmpeg') or 'ffmpeg'
+FFPROBE_BIN = shutil.which('ffprobe') or 'ffprobe'
+VIDEO_EXTENSIONS = frozenset(('.mp4', '.mov', '.mkv', '.avi', '.flv'))
 
 # --- 日志配置 ---
 logging.basicConfig(level=logging.INFO, format=f'[{SCRIPT_NAME} v{SCRIPT_VERSION}] [%(levelname)s] %(asctime)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S', stream=sys.stdout)
 
 # --- 核心函数 ---
 def run_command(cmd, command_name="外部命令"):
+    # 输出以原始字节返回 (ffprobe 的 JSON 可直接交给 json.loads)，仅失败时解码 stderr
     logging.debug(f"正在执行 {command_name} 命令: {' '.join(cmd)}")
     try:
         creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding=DEFAULT_ENCODING, errors='replace', creationflags=creationflags)
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=creationflags)
         stdout, stderr = process.communicate()
         if process.returncode != 0:
-            logging.error(f"{command_name} 执行失败，返回码: {process.returncode}\n{stderr.strip()}")
+            logging.error(f"{command_name} 执行失败，返回码: {process.returncode}\n{stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
         return process.returncode, stdout, stderr
     except FileNotFoundError:
         logging.error(f"命令 '{cmd[0]}' 未找到。请确保 FFmpeg/FFprobe 已安装并配置在系统PATH中。")
@@ -37,25 +48,128 @@ def run_command(cmd, command_name="外部命令"):
         logging.error(f"执行 {command_name} 时发生未知异常: {e}")
         return -1, None, None
 
-def run_ffprobe(input_file, show_entries, stream_type='v', stream_index=0):
-    cmd = ['ffprobe', '-v', 'error', '-select_streams', f'{stream_type}:{stream_index}', '-show_entries', show_entries, '-of', 'default=noprint_wrappers=1:nokey=1', input_file]
-    ret, out, _ = run_command(cmd, "ffprobe")
-    return out.strip() if ret == 0 and out else None
+def run_silent(cmd, command_name="外部命令", input_text=None):
+    # 不需要标准输出的命令 (ffmpeg)：丢弃 stdout，stderr 以字节读取，仅失败时解码；input_text 非空时写入标准输入
+    logging.debug(f"正在执行 {command_name} 命令: {' '.join(cmd)}")
+    stdin_kwargs = {'input': input_text.encode(DEFAULT_ENCODING)} if input_text is not None else {'stdin': subprocess.DEVNULL}
+    try:
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, creationflags=creationflags, **stdin_kwargs)
+        if result.returncode != 0:
+            logging.error(f"{command_name} 执行失败，返回码: {result.returncode}\n{result.stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
+        elif result.stderr and logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"{command_name} 标准错误输出:\n{result.stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
+        return result.returncode
+    except FileNotFoundError:
+        logging.error(f"命令 '{cmd[0]}' 未找到。请确保 FFmpeg/FFprobe 已安装并配置在系统PATH中。")
+        return -1
+    except Exception as e:
+        logging.error(f"执行 {command_name} 时发生未知异常: {e}")
+        return -1
 
-def run_ffmpeg_command(command_list):
-    cmd = ['ffmpeg', '-hide_banner', '-loglevel', 'warning', '-y'] + command_list
-    ret, _, _ = run_command(cmd, "ffmpeg")
+def probe_video(input_file):
+    # 一次 ffprobe 同时取回时长、首个视频流的宽/高/帧率以及是否含音轨
+    cmd = [FFPROBE_BIN, '-v', 'error', '-show_entries', 'stream=codec_type,width,height,r_frame_rate,sample_aspect_ratio:format=duration', '-of', 'json', input_file]
+    ret, out, _ = run_command(cmd, "ffprobe")
+    if ret != 0 or not out: return None
+    try: data = json.loads(out)
+    except ValueError as e:
+        logging.error(f"解析 ffprobe JSON 输出失败: {e}")
+        return None
+    streams = data.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), {})
+    return {'duration': data.get('format', {}).get('duration'), 'width': video.get('width'), 'height': video.get('height'),
+            'r_frame_rate': video.get('r_frame_rate'), 'sample_aspect_ratio': video.get('sample_aspect_ratio'), 'has_audio': any(s.get('codec_type') == 'audio' for s in streams)}
+
+def probe_audio(input_file):
+    # 一次 ffprobe 取回时长与首个音频流的编码
+    cmd = [FFPROBE_BIN, '-v', 'error', '-select_streams', 'a:0', '-show_entries', 'stream=codec_name:format=duration', '-of', 'json', input_file]
+    ret, out, _ = run_command(cmd, "ffprobe")
+    if ret != 0 or not out: return None
+    try: data = json.loads(out)
+    except ValueError as e:
+        logging.error(f"解析 ffprobe JSON 输出失败: {e}")
+        return None
+    streams = data.get('streams') or [{}]
+    return {'duration': data.get('format', {}).get('duration'), 'codec_name': streams[0].get('codec_name')}
+
+def _replace_audio_codec_args(audio_info):
+    # 直接替换音轨时，外部音频已是 AAC 则流复制；amix 混音必须解码，不适用
+    return ['-c:a', 'copy'] if audio_info.get('codec_name') == 'aac' else ['-c:a', 'aac', '-b:a', '192k']
+
+def _ffmpeg_threads(n_workers):
+    """按并发数均分 CPU 核心，使所有 ffmpeg 进程的线程总数约等于核心数。"""
+    return max(1, (os.cpu_count() or n_workers) // n_workers)
+
+def run_ffmpeg_command(command_list, input_text=None):
+    cmd = [FFMPEG_BIN, '-hide_banner', '-loglevel', 'warning', '-y'] + command_list
+    if FFMPEG_THREADS:
+        cmd[-1:-1] = ['-threads', str(FFMPEG_THREADS)]  # 输出选项，须位于输出文件之前
+    ret = run_silent(cmd, "ffmpeg", input_text)
     return ret == 0
 
+_BLACK_CLIP_DIR = None  # 本次运行共享的黑场片段目录，首次需要时创建
+_BLACK_CLIPS = {}  # (宽, 高, 帧率, 时长档位) -> 黑场片段路径
+_BLACK_CLIP_LOCKS = {}
+_BLACK_CLIP_LOCK = threading.Lock()
+_BLACK_CLIP_MAX_BUCKET = 8  # 超过该秒数的黑场不再按 2 的幂取整
+
+def get_black_clip(width, height, fps, min_duration):
+    """返回时长不短于 min_duration 的共享黑场片段路径，生成失败时返回 None。
+    片段按 (宽, 高, 帧率, 时长档位) 在同一次运行中只编码一次，且全部为 I 帧 (-g 1)，
+    可在 concat 列表中用 outpoint 按任意时长截取，无需为每个任务单独生成黑场。
+    档位在 _BLACK_CLIP_MAX_BUCKET 秒以内按 2 的幂取整，超过后按整秒向上取整，避免长片段多编码近一倍。"""
+    global _BLACK_CLIP_DIR
+    bucket = 1
+    while bucket < min_duration and bucket < _BLACK_CLIP_MAX_BUCKET: bucket *= 2
+    if bucket < min_duration: bucket = math.ceil(min_duration)
+    key = (width, height, str(fps), bucket)
+    with _BLACK_CLIP_LOCK:
+        if key in _BLACK_CLIPS: return _BLACK_CLIPS[key]
+        if _BLACK_CLIP_DIR is None:
+            _BLACK_CLIP_DIR = tempfile.TemporaryDirectory(prefix="black_clips_", ignore_cleanup_errors=True)
+        key_lock = _BLACK_CLIP_LOCKS.setdefault(key, threading.Lock())
+    with key_lock: # 同规格的其他任务等待这一次编码完成
+        if key not in _BLACK_CLIPS:
+            clip_path = os.path.join(_BLACK_CLIP_DIR.name, f"black_{width}x{height}_{fps}_{bucket}s.mp4")
+            black_cmd = ['-f', 'lavfi', '-i', f'color=c=black:s={width}x{height}:d={bucket}', '-r', str(fps),
+                         '-g', '1', '-pix_fmt', 'yuv420p', clip_path]
+            if not run_ffmpeg_command(black_cmd):
+                # 失败结果不写入缓存，后续任务会重新尝试生成
+                logging.error(f"生成黑场片段失败: {width}x{height} @ {fps}fps, {bucket}秒")
+                return None
+            _BLACK_CLIPS[key] = clip_path
+        return _BLACK_CLIPS[key]
+
+def cleanup_black_clips():
+    """删除本次运行生成的共享黑场片段。"""
+    if _BLACK_CLIP_DIR is not None:
+        _BLACK_CLIP_DIR.cleanup()
+
+@functools.lru_cache(maxsize=256)
+def _video_index(search_dir):
+    # 同一目录只扫描一次: {小写文件名(不含扩展名): (文件名(不含扩展名), 完整路径)}
+    index = {}
+    with os.scandir(search_dir) as it:
+        for entry in it:
+            video_name_no_ext, video_ext = os.path.splitext(entry.name)
+            if video_ext.lower() in VIDEO_EXTENSIONS and entry.is_file():
+                index.setdefault(video_name_no_ext.lower(), (video_name_no_ext, entry.path))
+    return index
+
 def find_corresponding_video_and_base_name(audio_file_path):
     audio_filename = os.path.basename(audio_file_path)
+    audio_name_lower = os.path.splitext(audio_filename)[0].lower()
     search_dir = os.path.dirname(os.path.dirname(os.path.abspath(audio_file_path)))
     
-    for entry in os.listdir(search_dir):
-        video_name_no_ext, video_ext = os.path.splitext(entry)
-        if video_ext.lower() in VIDEO_EXTENSIONS and audio_filename.lower().endswith(f"{video_name_no_ext.lower()}{os.path.splitext(audio_filename)[1].lower()}"):
-            logging.info(f"为音频 '{audio_filename}' 找到匹配的视频: '{entry}'")
-            return os.path.join(search_dir, entry), video_name_no_ext
+    # 视频名须为音频名的后缀 (如 "SE_xxx.wav" 对应 "xxx.mp4")，从最长后缀起逐个查表
+    index = _video_index(search_dir)
+    for start in range(len(audio_name_lower)):
+        match = index.get(audio_name_lower[start:])
+        if match:
+            video_name_no_ext, entry_path = match
+            logging.info(f"为音频 '{audio_filename}' 找到匹配的视频: '{os.path.basename(entry_path)}'")
+            return entry_path, video_name_no_ext
             
     logging.warning(f"未找到与 '{audio_filename}' 匹配的视频文件。")
     return None, None
@@ -78,7 +192,7 @@ def find_and_premix_audios(base_video_name, initial_audio_path, temp_dir):
     if len(matching_audios) == 1:
         return list(matching_audios)[0], None
 
-    temp_combined_audio_file = os.path.join(temp_dir, f"temp_premix_{base_video_name}_{int(time.time())}.wav")
+    temp_combined_audio_file = os.path.join(temp_dir, "premix.wav")
     mix_cmd = []
     filter_complex_parts = []
     for i, audio_path in enumerate(matching_audios):
@@ -96,34 +210,37 @@ def find_and_premix_audios(base_video_name, initial_audio_path, temp_dir):
         logging.error("预混合外部音频失败。")
         return None, None
 
-def process_audio_task(audio_file):
+def process_audio_task(task, fast_pad=False):
+    # task 为 main() 去重时得到的 (音频路径, 视频路径, 基础名)，无需再次查找视频
+    # 视频需延长时默认以 lavfi 黑场 + concat 滤镜一次完成 (视频重新编码)；fast_pad 时改用临时黑场片段 + concat 流复制
+    audio_file, video_file, base_video_name = task
     task_id = os.path.basename(audio_file)
     logging.info(f"--- [任务 {task_id}] 开始处理 (模式: 多音频自动混合) ---")
     
     abs_audio_file = os.path.abspath(audio_file)
     output_dir = os.path.abspath(OUTPUT_MIX_DIR)
     
-    video_file, base_video_name = find_corresponding_video_and_base_name(abs_audio_file)
-    if not video_file:
-        return 'skipped'
-
     abs_video_file = os.path.abspath(video_file)
     video_task_id = os.path.basename(video_file)
     output_file = os.path.join(output_dir, video_task_id)
 
-    premixed_audio_path, temp_premix_to_clean = None, None
-    temp_black_video, temp_concat_video, list_file_path = None, None, None
+    premixed_audio_path, temp_concat_video = None, None
+    # 预混合音频与黑场等中间文件放在任务专属的系统临时目录 (Linux 上通常为 tmpfs)，结束时整体删除
+    temp_dir = tempfile.TemporaryDirectory(prefix=f"mix_{base_video_name}_", ignore_cleanup_errors=True)
+    pad_source = None
     status_to_return = 'failed'
 
     try:
-        premixed_audio_path, temp_premix_to_clean = find_and_premix_audios(base_video_name, abs_audio_file, output_dir)
+        premixed_audio_path, _ = find_and_premix_audios(base_video_name, abs_audio_file, temp_dir.name)
         if not premixed_audio_path:
             logging.error(f"[任务 {task_id}] 预混合音频失败或未找到音频。")
             return 'failed'
 
-        video_duration_str = run_ffprobe(abs_video_file, 'format=duration')
-        external_audio_duration_str = run_ffprobe(premixed_audio_path, 'format=duration', 'a')
-        original_audio_exists = run_ffprobe(abs_video_file, 'format=duration', 'a') is not None
+        video_info = probe_video(abs_video_file) or {}
+        video_duration_str = video_info.get('duration')
+        audio_info = probe_audio(premixed_audio_path) or {}
+        external_audio_duration_str = audio_info.get('duration')
+        original_audio_exists = video_info.get('has_audio', False)
 
         if not all([video_duration_str, external_audio_duration_str]):
             logging.error(f"[任务 {task_id}] 无法获取视频或预混合音频的时长。")
@@ -137,37 +254,49 @@ def process_audio_task(audio_file):
             duration_diff = external_audio_duration - video_duration
             logging.info(f"[任务 {task_id}] 外部音频比视频长约 {duration_diff:.3f}秒，将生成黑场。")
             
-            video_width, video_height, video_fps = (run_ffprobe(abs_video_file, 'stream=width', 'v', 0),
-                                                    run_ffprobe(abs_video_file, 'stream=height', 'v', 0),
-                                                    run_ffprobe(abs_video_file, 'stream=r_frame_rate', 'v', 0))
+            video_width, video_height, video_fps = video_info.get('width'), video_info.get('height'), video_info.get('r_frame_rate')
             if not all([video_width, video_height, video_fps]): return status_to_return
-            if '/' in video_fps: num, den = map(float, video_fps.split('/')); video_fps = num/den if den else 30
-
-            temp_black_video = os.path.join(output_dir, f"temp_black_{base_video_name}.mp4")
-            temp_concat_video = os.path.join(output_dir, f"temp_concat_{base_video_name}.mp4")
-            list_file_path = os.path.join(output_dir, f"temp_list_{base_video_name}.txt")
-
-            run_ffmpeg_command(['-f', 'lavfi', '-i', f'color=c=black:s={video_width}x{video_height}:d={duration_diff:.6f}', '-r', str(video_fps), '-pix_fmt', 'yuv420p', temp_black_video])
-            with open(list_file_path, 'w') as f: f.write(f"file '{abs_video_file.replace('\\', '/')}'\nfile '{temp_black_video.replace('\\', '/')}'\n")
-            run_ffmpeg_command(['-f', 'concat', '-safe', '0', '-i', list_file_path, '-c', 'copy', temp_concat_video])
-            video_input_for_final_cmd = temp_concat_video
-
-        final_merge_cmd = []
+            # 部分封装的 r_frame_rate 为 0/0，分子或分母为 0 时按 30fps 处理
+            if '/' in video_fps:
+                num, den = map(float, video_fps.split('/'))
+                if not num or not den: video_fps = '30'
+            if not fast_pad:
+                # 黑场直接作为 lavfi 输入，由 concat 滤镜在内存中接到视频末尾，不写临时文件
+                sar = video_info.get('sample_aspect_ratio')
+                if not sar or sar in ('0:1', 'N/A'): sar = '1'
+                # 滤镜参数以 ':' 分隔，SAR 需写成 num/den 形式
+                pad_source = f'color=c=black:s={video_width}x{video_height}:d={duration_diff:.6f}:r={video_fps},setsar={sar.replace(":", "/")}'
+            else:
+                if '/' in video_fps: num, den = map(float, video_fps.split('/')); video_fps = num/den
+
+                temp_concat_video = os.path.join(temp_dir.name, "concat.mp4")
+
+                black_clip = get_black_clip(video_width, video_height, video_fps, duration_diff)
+                if not black_clip: return status_to_return
+                # concat 列表经标准输入传给 ffmpeg，不落盘；outpoint 从共享黑场片段中只截取所需时长
+                video_entry, black_entry = abs_video_file.replace('\\', '/'), black_clip.replace('\\', '/')
+                concat_list = f"file '{video_entry}'\nfile '{black_entry}'\noutpoint {duration_diff:.6f}\n"
+                run_ffmpeg_command(['-f', 'concat', '-safe', '0', '-protocol_whitelist', 'file,pipe', '-i', 'pipe:0', '-c', 'copy', temp_concat_video], concat_list)
+                video_input_for_final_cmd = temp_concat_video
+
+        final_merge_cmd = ['-i', video_input_for_final_cmd, '-i', premixed_audio_path]
+        filters, video_map, video_codec = [], '0:v:0', ['-c:v', 'copy']
+        original_audio_input = 0
+        if pad_source:
+            final_merge_cmd.extend(['-f', 'lavfi', '-i', pad_source])
+            filters.append('[0:v][2:v]concat=n=2:v=1:a=0[v_out]')
+            video_map, video_codec = '[v_out]', ['-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p']
+        elif original_audio_exists and video_input_for_final_cmd == temp_concat_video: # Video was extended, need original audio
+            final_merge_cmd.extend(['-i', abs_video_file])
+            original_audio_input = 2
         if original_audio_exists:
-            inputs = ['-i', video_input_for_final_cmd, '-i', premixed_audio_path]
-            filter_complex = '[0:a][1:a]amix=inputs=2:duration=longest[a_out]'
-            maps = ['-map', '0:v:0', '-map', '[a_out]']
-            if video_input_for_final_cmd == temp_concat_video: # Video was extended, need original audio
-                inputs.append('-i')
-                inputs.append(abs_video_file)
-                filter_complex = '[2:a][1:a]amix=inputs=2:duration=longest[a_out]'
-            final_merge_cmd.extend(inputs)
-            final_merge_cmd.extend(['-filter_complex', filter_complex])
-            final_merge_cmd.extend(maps)
+            filters.append(f'[{original_audio_input}:a][1:a]amix=inputs=2:duration=longest[a_out]')
+            audio_map, audio_codec = '[a_out]', ['-c:a', 'aac', '-b:a', '192k']
         else:
-            final_merge_cmd.extend(['-i', video_input_for_final_cmd, '-i', premixed_audio_path, '-map', '0:v:0', '-map', '1:a:0'])
-        
-        final_merge_cmd.extend(['-c:v', 'copy', '-c:a', 'aac', '-b:a', '192k', output_file])
+            audio_map, audio_codec = '1:a:0', _replace_audio_codec_args(audio_info)
+        if filters:
+            final_merge_cmd.extend(['-filter_complex', ';'.join(filters)])
+        final_merge_cmd.extend(['-map', video_map, '-map', audio_map, *video_codec, *audio_codec, output_file])
 
         logging.info(f"[任务 {task_id}] 开始最终混合...")
         if run_ffmpeg_command(final_merge_cmd):
@@ -178,15 +307,24 @@ def process_audio_task(audio_file):
 
         return status_to_return
     finally:
-        for f in [temp_premix_to_clean, temp_black_video, temp_concat_video, list_file_path]:
-            if f and os.path.exists(f): os.remove(f)
+        temp_dir.cleanup()
         logging.info(f"--- [任务 {task_id}] 处理结束 (状态: {status_to_return.upper()}) ---")
 
 def main():
     parser = argparse.ArgumentParser(description=f'{SCRIPT_NAME} v{SCRIPT_VERSION} - 自动查找并混合所有带前缀的音频文件到匹配的视频中。')
     parser.add_argument('files', nargs='*', help='一个或多个要处理的音频文件路径。脚本将自动查找关联文件。')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, metavar='N',
+                        help=f'并发处理的任务数 (默认: {MAX_WORKERS})。')
+    parser.add_argument('--ffmpeg-threads', type=int, default=None, metavar='N',
+                        help='每个 ffmpeg 进程使用的线程数 (默认: CPU 核心数 / 并发数)。')
+    parser.add_argument('--fast-pad', action='store_true',
+                        help='延长视频时使用黑场片段 + concat 流复制，不重新编码 (默认: concat 滤镜单次处理)。')
     args = parser.parse_args()
 
+    global FFMPEG_THREADS
+    workers = max(1, args.workers)
+    FFMPEG_THREADS = args.ffmpeg_threads or _ffmpeg_threads(workers)
+
     if not args.files:
         logging.warning("未提供任何文件。请拖放至少一个音频文件到脚本上。")
         return
@@ -198,9 +336,9 @@ def main():
     processed_files = set() # Track processed base names to avoid redundant work
     tasks_to_run = []
     for f in args.files:
-        _, base_name = find_corresponding_video_and_base_name(f)
+        video_file, base_name = find_corresponding_video_and_base_name(f)
         if base_name and base_name not in processed_files:
-            tasks_to_run.append(f)
+            tasks_to_run.append((f, video_file, base_name))
             processed_files.add(base_name)
         elif not base_name:
              logging.warning(f"无法为 '{f}' 找到视频，跳过。")
@@ -212,8 +350,8 @@ def main():
     logging.info(f"去重后，将执行 {total_tasks} 个独立的处理任务。")
 
     completed, skipped, failed = 0, (len(args.files) - total_tasks), 0
-    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        future_to_audio = {executor.submit(process_audio_task, f): f for f in tasks_to_run}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        future_to_audio = {executor.submit(process_audio_task, task, args.fast_pad): task[0] for task in tasks_to_run}
         for future in as_completed(future_to_audio):
             status = future.result()
             if status == 'success': completed += 1
@@ -221,6 +359,7 @@ def main():
             else: failed += 1
             logging.info(f"进度: {completed+skipped+failed}/{total_tasks} | ✅成功: {completed} | ⏩跳过: {skipped} | ❌失败: {failed}")
 
+    cleanup_black_clips()
     duration = time.time() - start_time
     logging.info(f"---\n所有任务处理完毕。总耗时: {duration:.2f}s\n总计: ✅成功: {completed}, ⏩跳过: {skipped}, ❌失败: {failed}\n---")
 
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
-# -*- coding: utf-8 -*-"""
+# -*- coding: utf-8 -*-
+"""
 视频颜色通道转换脚本 (参数版本)
 功能：处理通过命令行参数传入的视频文件，应用RGBA→BGRA颜色滤镜
 """
@@ -7,33 +8,73 @@
 import os
 import sys
 import subprocess
+import shutil
 import argparse
 import logging
 import time
+import functools
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # --- 配置区 ---
 SCRIPT_NAME = "xy_RGBA_to_BGRA"
 SCRIPT_VERSION = "1.0.0"
-MAX_WORKERS = os.cpu_count() or 4
+MAX_WORKERS = max(1, (os.cpu_count() or 4) // 2)  # ffmpeg 自身多线程，任务并发取核心数的一半
+FFMPEG_THREADS = None  # 每个 ffmpeg 进程的线程数，由 main() 按并发数设置
 DEFAULT_ENCODING = 'utf-8'
+# 启动时解析一次 ffmpeg 的绝对路径，避免每次启动子进程都搜索 PATH (Windows 下还要遍历 PATHEXT)
+FFMPEG_BIN = shutil.which('ffmpeg') or 'ffmpeg'
+# R/B 通道互换：gbrap 平面顺序为 G,B,R,A，交换 1/2 号平面即可，只是内存拷贝而无逐像素乘加
+CHANNEL_SWAP_FILTER = 'format=gbrap,shuffleplanes=0:2:1:3,format=yuv420p'
+USE_HWACCEL = False  # 由 main() 根据 --hwaccel 及 NVENC 可用性设置
+X264_PRESET = 'veryfast'  # 通道互换本身已是有损重编码，优先速度
+X264_CRF = 20
+X264_TUNE = None
+FASTSTART_SUFFIXES = frozenset(('.mp4', '.mov', '.m4v'))  # 支持 -movflags +faststart 的容器
 
 # --- 日志配置 ---
 logging.basicConfig(level=logging.INFO, format=f'[{SCRIPT_NAME} v{SCRIPT_VERSION}] [%(levelname)s] %(asctime)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S', stream=sys.stdout)
 
+def _ffmpeg_threads(n_workers):
+    """按并发数均分 CPU 核心，使所有 ffmpeg 进程的线程总数约等于核心数。"""
+    return max(1, (os.cpu_count() or n_workers) // n_workers)
+
+@functools.lru_cache(maxsize=1)
+def _nvenc_available():
+    """检查 ffmpeg 是否带有 h264_nvenc 编码器，结果只探测一次。"""
+    try:
+        creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        result = subprocess.run([FFMPEG_BIN, '-hide_banner', '-encoders'], stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, creationflags=creationflags)
+    except OSError:
+        return False
+    return result.returncode == 0 and b'h264_nvenc' in result.stdout
+
+def _video_codec_args():
+    """按当前配置返回视频编码参数。"""
+    if USE_HWACCEL:
+        # -b:v 0 取消默认码率上限，-cq 才真正决定画质
+        return ['-c:v', 'h264_nvenc', '-preset', 'p4', '-rc', 'vbr', '-cq', str(X264_CRF), '-b:v', '0']
+    args = ['-c:v', 'libx264', '-preset', X264_PRESET, '-crf', str(X264_CRF)]
+    if X264_TUNE:
+        args += ['-tune', X264_TUNE]
+    return args
+
 def run_ffmpeg_command(cmd_list):
     """执行FFmpeg命令并处理输出。"""
+    if FFMPEG_THREADS:
+        cmd_list = cmd_list[:-1] + ['-threads', str(FFMPEG_THREADS)] + cmd_list[-1:]  # 输出选项，须位于输出文件之前
     logging.debug(f"Executing FFmpeg command: {' '.join(cmd_list)}")
     try:
         creationflags = subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        # 标准输出无用，直接丢弃；标准错误以字节读取，仅失败时解码
         result = subprocess.run(
-            cmd_list, capture_output=True, text=True, encoding=DEFAULT_ENCODING,
-            errors='replace', timeout=600, creationflags=creationflags
+            cmd_list, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            timeout=600, creationflags=creationflags
         )
         if result.returncode != 0:
             logging.error(f"FFmpeg执行失败。返回码: {result.returncode}")
-            logging.error(f"FFmpeg 错误输出:\n{result.stderr.strip()}")
+            logging.error(f"FFmpeg 错误输出:\n{result.stderr.decode(DEFAULT_ENCODING, errors='replace').strip()}")
             return False
         return True
     except FileNotFoundError:
@@ -56,7 +97,6 @@ def process_single_video(video_path):
     
     video_file = Path(video_path)
     temp_path = None
-    backup_path = None
 
     try:
         # 创建临时文件路径
@@ -64,11 +104,13 @@ def process_single_video(video_path):
 
         # 构建ffmpeg命令
         cmd = [
-            'ffmpeg',
+            FFMPEG_BIN,
+            *(['-hwaccel', 'cuda'] if USE_HWACCEL else []),
             '-i', str(video_file),
-            '-vf', 'format=rgba,colorchannelmixer=rr=0:rg=0:rb=1:ra=0:gr=0:gg=1:gb=0:ga=0:br=1:bg=0:bb=0:ba=0:ar=0:ag=0:ab=0:aa=1,format=yuv420p',
-            '-c:v', 'libx264',
+            '-vf', CHANNEL_SWAP_FILTER,
+            *_video_codec_args(),
             '-c:a', 'copy',
+            *(['-movflags', '+faststart'] if video_file.suffix.lower() in FASTSTART_SUFFIXES else []),
             '-y',
             str(temp_path)
         ]
@@ -84,45 +126,56 @@ def process_single_video(video_path):
 
         # 安全地替换原文件
         logging.info(f"[任务 {task_id}] 转换成功，正在替换原文件...")
-        backup_path = video_file.with_suffix(video_file.suffix + '.bak')
-        
-        # 1. 将原文件重命名为备份
-        os.rename(video_file, backup_path)
-        
         try:
-            # 2. 将临时文件重命名为原文件名
-            os.rename(temp_path, video_file)
-            # 3. 删除备份
-            os.remove(backup_path)
+            # os.replace 为原子替换 (POSIX rename / Windows MoveFileEx)，失败时原文件保持不变
+            os.replace(temp_path, video_file)
             logging.info(f"[任务 {task_id}] ✅ 文件更新成功。")
             return 'success'
-        except Exception as e:
-            logging.error(f"[任务 {task_id}] ❌ 替换文件时出错: {e}。正在从备份恢复...", exc_info=True)
-            # 如果替换失败，则恢复备份
-            if not video_file.exists():
-                os.rename(backup_path, video_file)
+        except OSError as e:
+            logging.error(f"[任务 {task_id}] ❌ 替换文件时出错: {e}。原文件未改动，转换结果保留在: {temp_path}")
+            temp_path = None # 保留转换结果以便手动恢复
             return 'failed'
 
     except Exception as e:
         logging.error(f"[任务 {task_id}] ❌ 处理过程中发生意外错误: {e}", exc_info=True)
         return 'failed'
     finally:
-        # 清理临时文件和可能的残留备份
-        for p in [temp_path, backup_path]:
-            if p and os.path.exists(p):
-                try:
-                    os.remove(p)
-                    logging.debug(f"[任务 {task_id}] 已清理残留文件: {p}")
-                except OSError:
-                    pass # 忽略清理错误
+        # 清理残留的临时文件
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+                logging.debug(f"[任务 {task_id}] 已清理残留文件: {temp_path}")
+            except OSError:
+                pass # 忽略清理错误
         logging.info(f"--- [任务 {task_id}] 处理结束 ---")
 
 def main():
     """主函数"""
+    global FFMPEG_THREADS, USE_HWACCEL, X264_PRESET, X264_CRF, X264_TUNE
     parser = argparse.ArgumentParser(description=f'{SCRIPT_NAME} v{SCRIPT_VERSION} - 转换指定视频文件的颜色通道 (RGBA -> BGRA)。')
     parser.add_argument('files', nargs='*', help='一个或多个要处理的视频文件路径。')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, metavar='N',
+                        help=f'并发处理的任务数 (默认: {MAX_WORKERS})。')
+    parser.add_argument('--ffmpeg-threads', type=int, default=None, metavar='N',
+                        help='每个 ffmpeg 进程使用的线程数 (默认: CPU 核心数 / 并发数)。')
+    parser.add_argument('--preset', default=X264_PRESET,
+                        help=f'libx264 编码预设 (默认: {X264_PRESET})。')
+    parser.add_argument('--crf', type=int, default=X264_CRF,
+                        help=f'编码质量 CRF，NVENC 下用作 -cq (默认: {X264_CRF})。')
+    parser.add_argument('--tune', default=None,
+                        help='libx264 -tune 参数，如 zerolatency 可进一步降低内存占用 (默认: 不设置)。')
+    parser.add_argument('--hwaccel', action='store_true',
+                        help='使用 CUDA 解码与 h264_nvenc 编码 (不可用时回退到 libx264)。')
     args = parser.parse_args()
 
+    X264_PRESET, X264_CRF, X264_TUNE = args.preset, args.crf, args.tune
+    workers = max(1, args.workers)
+    FFMPEG_THREADS = args.ffmpeg_threads or _ffmpeg_threads(workers)
+    if args.hwaccel:
+        USE_HWACCEL = _nvenc_available()
+        if not USE_HWACCEL:
+            logging.warning("未检测到 h264_nvenc 编码器，将使用 libx264 进行软件编码。")
+
     start_time = time.time()
     logging.info("="*20 + f" {SCRIPT_NAME} v{SCRIPT_VERSION} 开始执行 " + "="*20)
 
@@ -136,9 +189,9 @@ def main():
 
     completed_tasks, failed_tasks = 0, 0
 
-    logging.info(f"开始使用最多 {MAX_WORKERS} 个线程进行处理...")
+    logging.info(f"开始使用最多 {workers} 个线程进行处理 (每个 ffmpeg {FFMPEG_THREADS} 线程)...")
     try:
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
             future_to_video = {executor.submit(process_single_video, f): f for f in video_files}
 
             for future in as_completed(future_to_video):
@@ -161,4 +214,26 @@ def main():
         logging.error(f"线程池执行期间发生严重错误: {e}", exc_info=True)
 
     duration = time.time() - start_time
-    logging.info("-
\ No newline at end of file
+    logging.info("-" * 60)
+    logging.info("所有任务尝试处理完毕。")
+    logging.info(f"总计处理的视频文件数: {total_tasks}")
+    logging.info(f"✅ 成功: {completed_tasks}")
+    logging.info(f"❌ 失败: {failed_tasks}")
+    logging.info(f"总耗时: {duration:.2f} 秒 ({time.strftime('%H:%M:%S', time.gmtime(duration))})")
+
+    if failed_tasks > 0: logging.warning("存在处理失败的任务，请检查以上日志获取详情。")
+
+    logging.info("="*20 + f" {SCRIPT_NAME} v{SCRIPT_VERSION} 执行完毕 " + "="*20)
+
+if __name__ == "__main__":
+    try:
+        if not shutil.which(FFMPEG_BIN):
+            logging.critical("错误: 'ffmpeg' 命令未找到。请确保FFmpeg已安装并位于系统PATH中。脚本无法继续。")
+            sys.exit(1)
+        main()
+    except SystemExit:
+        pass
+    except Exception as e:
+        logging.critical(f"脚本顶层发生未捕获的异常: {e}", exc_info=True)
+    finally:
+        logging.shutdown()